@@ -1,7 +1,10 @@
 # encoding: utf-8
 
 import sys
+import time
 import asyncio
+import wsql
+from concurrent.futures import ThreadPoolExecutor
 from wsql import cluster
 
 
@@ -17,11 +20,19 @@ CONN_PARAMS = {
 }
 
 
+SYNC_CONN_PARAMS = {
+    'host': '127.0.0.1',
+    'user': 'root',
+    'password': '',
+    'database': 'test',
+    'defer_warnings': True
+}
+
+
 POOL = None
 
 
-@asyncio.coroutine
-def prepare():
+async def prepare():
     global POOL
     POOL = cluster.connect(CONN_PARAMS,
                            loop=io_loop,
@@ -31,14 +42,13 @@ def prepare():
 
 
 def _q(sql, *args):
-    @asyncio.coroutine
-    def query(connection):
+    async def query(connection):
         cursor = connection.cursor()
         try:
-            yield from cursor.execute(sql, args)
-            return (yield from cursor.fetchall())
+            await cursor.execute(sql, args)
+            return await cursor.fetchall()
         finally:
-            yield from cursor.close()
+            await cursor.close()
 
     return query
 
@@ -47,10 +57,8 @@ def test_db_sleep():
     return POOL.execute(_q(b"SELECT SLEEP(%s)", 1))
 
 
-@asyncio.coroutine
-def test_table():
-    @asyncio.coroutine
-    def query(connection):
+async def test_table():
+    async def query(connection):
         q = (b'CREATE TABLE IF NOT EXISTS `test_table` ( '
              b'`id` int NOT NULL STORAGE MEMORY AUTO_INCREMENT, '
              b'`key` varchar(20) NOT NULL STORAGE MEMORY, '
@@ -63,52 +71,66 @@ def test_table():
 
         cursor = connection.cursor()
         try:
-            yield from cursor.execute(q)
+            await cursor.execute(q)
 
             with open('data.sql', 'rb') as f:
                 for x, q1 in enumerate(f):
-                    yield from cursor.execute(q1)
+                    await cursor.execute(q1)
                     sys.stdout.write('\r%04d ' % x)
         finally:
-            yield from cursor.close()
+            await cursor.close()
 
-    yield from POOL.execute(query)
+    await POOL.execute(query)
 
 
 
-@asyncio.coroutine
-def test_table_select():
-    data = yield from POOL.execute(_q(b'select * from test_table limit 1000000'))
+async def test_table_select():
+    data = await POOL.execute(_q(b'select * from test_table limit 1000000'))
     print(len(data))
 
 
-@asyncio.coroutine
-def test_table_select_one_by_one():
-    @asyncio.coroutine
-    def query(connection):
+async def test_table_select_one_by_one():
+    async def query(connection):
         cursor = connection.cursor()
         try:
-            yield from cursor.execute(b'select * from test_table limit 1000000')
+            await cursor.execute(b'select * from test_table limit 1000000')
             c = 0
-            data = (yield from cursor.fetchone())
-            while data:
-                data = yield from cursor.fetchone()
+            async for _ in cursor:
                 c += 1
             print(c)
         finally:
-            yield from cursor.close()
+            await cursor.close()
 
-    yield from POOL.execute(query)
+    await POOL.execute(query)
 
 
-@asyncio.coroutine
-def test():
+async def test():
     tasks = []
     add_task = tasks.append
     for _ in range(1800):
-        add_task(asyncio.async(test_db_sleep(), loop=io_loop))
+        add_task(io_loop.create_task(test_db_sleep()))
+
+    await asyncio.wait(tasks)
+
 
-    yield from asyncio.wait(tasks, loop=io_loop)
+def _sync_worker(count):
+    connection = wsql.connect(**SYNC_CONN_PARAMS)
+    try:
+        with connection.cursor() as cursor:
+            for _ in range(count):
+                cursor.execute(b"SELECT SLEEP(0.01)")
+                cursor.fetchall()
+    finally:
+        connection.close()
+
+
+def test_threads_scaling(total=400):
+    # the blocking calls release GIL, so the queries of threads overlap
+    for workers in (1, 2, 4, 8, 16):
+        t = time.monotonic()
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(_sync_worker, [total // workers] * workers))
+        print("{} threads: {}".format(workers, time.monotonic() - t))
 
 
 def periodic_callback():
@@ -143,16 +165,18 @@ if __name__ == '__main__':
     print(io_loop.run_until_complete(test()))
     print("Execution time: {}".format(io_loop.time() - t))
 
-    @asyncio.coroutine
-    def cleanup():
-        def query(connection):
+    print("Starting test: Sync cursor thread scaling")
+    test_threads_scaling()
+
+    async def cleanup():
+        async def query(connection):
             cursor = connection.cursor()
             try:
-                yield from cursor.execute(b"DROP TABLE `test_table`")
+                await cursor.execute(b"DROP TABLE `test_table`")
             finally:
-                yield from cursor.close()
+                await cursor.close()
 
-        yield from POOL.execute(query)
+        await POOL.execute(query)
 
     print(io_loop.run_until_complete(cleanup()))
     print('stop')
@@ -193,13 +193,15 @@ __name__ = "wsql"
 __version__ = "1.2.13"
 
 module1 = Extension('_' + __name__,
-                    sources=["./src/connection.c",
+                    sources=["./src/codecs.c",
+                             "./src/connection.c",
                              "./src/constants.c",
                              "./src/exceptions.c",
                              "./src/fields.c",
                              "./src/format.c",
                              "./src/module.c",
-                             "./src/results.c"],
+                             "./src/results.c",
+                             "./src/statements.c"],
                     extra_compile_args=["-Os", "-g", "-std=c99", "-fno-strict-aliasing",
                                         "-Wno-error=declaration-after-statement"],
                     extra_link_args=["-lstdc++"],
@@ -227,6 +229,7 @@ setup(
     cmdclass=cmdclass,
     ext_modules=[module1],
     packages=["wsql", "wsql.cluster"],
+    python_requires='>=3.10',
     author="@bg",
     author_email='gaifullinbf@gmail.com',
     maintainer='Bulat Gaifullin',
@@ -246,7 +249,7 @@ setup(
         "Operating System :: POSIX :: Linux",
         "Operating System :: Unix",
         "Programming Language :: C",
-        "Programming Language :: Python :: 3.4",
+        "Programming Language :: Python :: 3.10",
         "Topic :: Database",
         "Topic :: Database :: Database Engines/Servers",
     ]
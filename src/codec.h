@@ -0,0 +1,56 @@
+/*
+WSQL
+====
+An asynchronous python interface to MySQL
+---------------------------------------------------------
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+*/
+
+#ifndef __WSQL_CODEC_H__
+#define __WSQL_CODEC_H__
+
+#include "common.h"
+
+/* The codecs to decode values of text protocol without python calls */
+enum wsql_codec_t {
+    WSQL_CODEC_CALL = -1,   /* python callable, internal */
+    WSQL_CODEC_BYTES = 0,
+    WSQL_CODEC_INT,
+    WSQL_CODEC_FLOAT,
+    WSQL_CODEC_DECIMAL,
+    WSQL_CODEC_DATE,
+    WSQL_CODEC_DATETIME,
+    WSQL_CODEC_TIME,
+    WSQL_CODEC_STRING,
+    WSQL_CODEC_MAX
+};
+
+extern int wsql_codecs_init(PyObject* module);
+
+extern PyObject* wsql_decode_value(int codec, const char *data, unsigned long length);
+
+/* decodes the value of INT or FLOAT codec to long long (unsigned long long) or double */
+extern int wsql_decode_raw(int codec, int is_unsigned, const char *data, unsigned long length, void *value);
+
+/* fills MYSQL_TIME by date, datetime, time or timedelta, returns 0 if obj has other type */
+extern int wsql_encode_time(PyObject *obj, MYSQL_TIME *time, enum enum_field_types *type);
+
+/* creates date, datetime or timedelta from MYSQL_TIME of the binary protocol */
+extern PyObject* wsql_decode_time_struct(const MYSQL_TIME *time, enum enum_field_types type);
+
+/* creates array.array with typecode from the bytes-like data */
+extern PyObject* wsql_new_array(char typecode, PyObject *data);
+
+#endif //__WSQL_CODEC_H__
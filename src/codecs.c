@@ -0,0 +1,390 @@
+/*
+WSQL
+====
+An asynchronous python interface to MySQL
+---------------------------------------------------------
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+*/
+
+#include "codec.h"
+#include <datetime.h>
+#include <errno.h>
+
+static PyObject *wsql_decimal_t = NULL;
+static PyObject *wsql_array_t = NULL;
+
+/* parse unsigned decimal number, returns the number of parsed characters */
+static unsigned long wsql_parse_uint(const char *data, unsigned long length, unsigned int *value)
+{
+    unsigned long i;
+    unsigned int result = 0;
+
+    for (i = 0; i < length && data[i] >= '0' && data[i] <= '9'; ++i)
+        result = result * 10 + (data[i] - '0');
+
+    *value = result;
+    return i;
+}
+
+/* parse the fractional part of seconds, the digits are padded to microseconds */
+static unsigned int wsql_parse_microseconds(const char *data, unsigned long length)
+{
+    unsigned long i;
+    unsigned int result = 0;
+
+    if (length == 0 || data[0] != '.')
+        return 0;
+
+    for (i = 1; i < 7; ++i)
+    {
+        result *= 10;
+        if (i < length && data[i] >= '0' && data[i] <= '9')
+            result += data[i] - '0';
+    }
+    return result;
+}
+
+static PyObject* wsql_decode_int(const char *data, unsigned long length)
+{
+    unsigned long long value = 0;
+    unsigned long i = 0;
+    int negative = 0;
+
+    if (length > 0 && (data[0] == '-' || data[0] == '+'))
+    {
+        negative = data[0] == '-';
+        ++i;
+    }
+
+    /* 18 digits always fit into long long */
+    if (length - i > 0 && length - i <= 18)
+    {
+        for (; i < length; ++i)
+        {
+            if (data[i] < '0' || data[i] > '9')
+                goto on_slow_path;
+            value = value * 10 + (data[i] - '0');
+        }
+        return PyLong_FromLongLong(negative ? -(long long)value : (long long)value);
+    }
+
+  on_slow_path:
+    /* the data is terminated by zero */
+    return PyLong_FromString((char *)data, NULL, 10);
+}
+
+static PyObject* wsql_decode_float(const char *data, unsigned long length)
+{
+    double value = PyOS_string_to_double(data, NULL, NULL);
+    if (value == -1.0 && PyErr_Occurred())
+        return NULL;
+    return PyFloat_FromDouble(value);
+}
+
+static PyObject* wsql_decode_decimal(const char *data, unsigned long length)
+{
+    PyObject *text, *result;
+
+    if (!(text = PyUnicode_DecodeASCII(data, length, NULL)))
+        return NULL;
+
+    result = PyObject_CallFunctionObjArgs(wsql_decimal_t, text, NULL);
+    Py_DECREF(text);
+    return result;
+}
+
+static PyObject* wsql_decode_value_error(const char *kind, const char *data, unsigned long length)
+{
+    PyObject *value = PyBytes_FromStringAndSize(data, length);
+    if (value)
+    {
+        PyErr_Format(PyExc_ValueError, "invalid %s literal: %R", kind, value);
+        Py_DECREF(value);
+    }
+    return NULL;
+}
+
+/* YYYY-MM-DD */
+static unsigned long wsql_parse_date(const char *data, unsigned long length, unsigned int *parts)
+{
+    unsigned long pos = 0, n;
+    int i;
+
+    for (i = 0; i < 3; ++i)
+    {
+        if (i > 0)
+        {
+            if (pos >= length || data[pos] != '-')
+                return 0;
+            ++pos;
+        }
+        if (!(n = wsql_parse_uint(data + pos, length - pos, parts + i)))
+            return 0;
+        pos += n;
+    }
+    return pos;
+}
+
+/* HH:MM:SS */
+static unsigned long wsql_parse_time(const char *data, unsigned long length, unsigned int *parts)
+{
+    unsigned long pos = 0, n;
+    int i;
+
+    for (i = 0; i < 3; ++i)
+    {
+        if (i > 0)
+        {
+            if (pos >= length || data[pos] != ':')
+                return 0;
+            ++pos;
+        }
+        if (!(n = wsql_parse_uint(data + pos, length - pos, parts + i)))
+            return 0;
+        pos += n;
+    }
+    return pos;
+}
+
+static PyObject* wsql_decode_date(const char *data, unsigned long length)
+{
+    unsigned int date[3];
+
+    if (wsql_parse_date(data, length, date) != length)
+        return wsql_decode_value_error("date", data, length);
+
+    return PyDate_FromDate(date[0], date[1], date[2]);
+}
+
+static PyObject* wsql_decode_datetime(const char *data, unsigned long length)
+{
+    unsigned int date[3], time[3];
+    unsigned long pos, n;
+
+    if (!(pos = wsql_parse_date(data, length, date)) || pos >= length || data[pos] != ' ')
+        return wsql_decode_value_error("datetime", data, length);
+
+    ++pos;
+    if (!(n = wsql_parse_time(data + pos, length - pos, time)))
+        return wsql_decode_value_error("datetime", data, length);
+
+    pos += n;
+    return PyDateTime_FromDateAndTime(date[0], date[1], date[2], time[0], time[1], time[2],
+                                      wsql_parse_microseconds(data + pos, length - pos));
+}
+
+static PyObject* wsql_decode_time(const char *data, unsigned long length)
+{
+    unsigned int time[3];
+    unsigned long pos = 0, n;
+    int days = 0;
+
+    if (length > 0 && data[0] == '-')
+        pos = 1;
+
+    if (!(n = wsql_parse_time(data + pos, length - pos, time)))
+        return wsql_decode_value_error("time", data, length);
+
+    /* the same as converters.sql_to_timedelta, -00:MM:SS is positive */
+    if (pos && time[0] > 0)
+        days = -1;
+
+    pos += n;
+    return PyDelta_FromDSU(days, time[0] * 3600 + time[1] * 60 + time[2],
+                           wsql_parse_microseconds(data + pos, length - pos));
+}
+
+PyObject* wsql_decode_value(int codec, const char *data, unsigned long length)
+{
+    switch (codec)
+    {
+    case WSQL_CODEC_INT:
+        return wsql_decode_int(data, length);
+    case WSQL_CODEC_FLOAT:
+        return wsql_decode_float(data, length);
+    case WSQL_CODEC_DECIMAL:
+        return wsql_decode_decimal(data, length);
+    case WSQL_CODEC_DATE:
+        return wsql_decode_date(data, length);
+    case WSQL_CODEC_DATETIME:
+        return wsql_decode_datetime(data, length);
+    case WSQL_CODEC_TIME:
+        return wsql_decode_time(data, length);
+    case WSQL_CODEC_STRING:
+        return PyUnicode_DecodeUTF8(data, length, NULL);
+    default:
+        return PyBytes_FromStringAndSize(data, length);
+    }
+}
+
+int wsql_decode_raw(int codec, int is_unsigned, const char *data, unsigned long length, void *value)
+{
+    char *end = NULL;
+
+    if (!data)
+    {
+        PyErr_SetString(PyExc_ValueError, "NULL has no raw representation.");
+        return -1;
+    }
+
+    /* the data is terminated by zero */
+    switch (codec)
+    {
+    case WSQL_CODEC_INT:
+        errno = 0;
+        if (is_unsigned)
+            *(unsigned long long *)value = strtoull(data, &end, 10);
+        else
+            *(long long *)value = strtoll(data, &end, 10);
+        if (errno)
+            end = NULL;
+        break;
+    case WSQL_CODEC_FLOAT:
+        *(double *)value = PyOS_string_to_double(data, &end, NULL);
+        if (PyErr_Occurred())
+            return -1;
+        break;
+    default:
+        PyErr_Format(PyExc_TypeError, "codec %d has no raw representation.", codec);
+        return -1;
+    }
+
+    if (length == 0 || end != data + length)
+    {
+        wsql_decode_value_error(codec == WSQL_CODEC_INT ? "int" : "float", data, length);
+        return -1;
+    }
+    return 0;
+}
+
+int wsql_encode_time(PyObject *obj, MYSQL_TIME *time, enum enum_field_types *type)
+{
+    long seconds;
+
+    memset(time, 0, sizeof(MYSQL_TIME));
+    if (PyDateTime_Check(obj))
+    {
+        time->year = PyDateTime_GET_YEAR(obj);
+        time->month = PyDateTime_GET_MONTH(obj);
+        time->day = PyDateTime_GET_DAY(obj);
+        time->hour = PyDateTime_DATE_GET_HOUR(obj);
+        time->minute = PyDateTime_DATE_GET_MINUTE(obj);
+        time->second = PyDateTime_DATE_GET_SECOND(obj);
+        time->second_part = PyDateTime_DATE_GET_MICROSECOND(obj);
+        time->time_type = MYSQL_TIMESTAMP_DATETIME;
+        *type = MYSQL_TYPE_DATETIME;
+        return 1;
+    }
+    if (PyDate_Check(obj))
+    {
+        time->year = PyDateTime_GET_YEAR(obj);
+        time->month = PyDateTime_GET_MONTH(obj);
+        time->day = PyDateTime_GET_DAY(obj);
+        time->time_type = MYSQL_TIMESTAMP_DATE;
+        *type = MYSQL_TYPE_DATE;
+        return 1;
+    }
+    if (PyTime_Check(obj))
+    {
+        time->hour = PyDateTime_TIME_GET_HOUR(obj);
+        time->minute = PyDateTime_TIME_GET_MINUTE(obj);
+        time->second = PyDateTime_TIME_GET_SECOND(obj);
+        time->second_part = PyDateTime_TIME_GET_MICROSECOND(obj);
+        time->time_type = MYSQL_TIMESTAMP_TIME;
+        *type = MYSQL_TYPE_TIME;
+        return 1;
+    }
+    if (PyDelta_Check(obj))
+    {
+        /* the same as converters.timedelta_to_sql */
+        seconds = PyDateTime_DELTA_GET_SECONDS(obj);
+        time->neg = PyDateTime_DELTA_GET_DAYS(obj) < 0;
+        time->hour = (seconds / 3600) % 24;
+        time->minute = (seconds / 60) % 60;
+        time->second = seconds % 60;
+        time->second_part = PyDateTime_DELTA_GET_MICROSECONDS(obj);
+        time->time_type = MYSQL_TIMESTAMP_TIME;
+        *type = MYSQL_TYPE_TIME;
+        return 1;
+    }
+    return 0;
+}
+
+PyObject* wsql_decode_time_struct(const MYSQL_TIME *time, enum enum_field_types type)
+{
+    switch (type)
+    {
+    case MYSQL_TYPE_DATE:
+    case MYSQL_TYPE_NEWDATE:
+        return PyDate_FromDate(time->year, time->month, time->day);
+    case MYSQL_TYPE_TIME:
+        /* the same as converters.sql_to_timedelta */
+        return PyDelta_FromDSU((time->neg && (time->hour || time->day)) ? -1 : 0,
+                               (time->day * 24 + time->hour) * 3600 + time->minute * 60 + time->second,
+                               time->second_part);
+    default:
+        return PyDateTime_FromDateAndTime(time->year, time->month, time->day,
+                                          time->hour, time->minute, time->second, time->second_part);
+    }
+}
+
+PyObject* wsql_new_array(char typecode, PyObject *data)
+{
+    return PyObject_CallFunction(wsql_array_t, "CO", (int)typecode, data);
+}
+
+int wsql_codecs_init(PyObject* module)
+{
+    PyObject *decimal, *array, *constants;
+
+    PyDateTime_IMPORT;
+    if (!PyDateTimeAPI)
+        return -1;
+
+    if (!(decimal = PyImport_ImportModule("decimal")))
+        return -1;
+
+    wsql_decimal_t = PyObject_GetAttrString(decimal, "Decimal");
+    Py_DECREF(decimal);
+    if (!wsql_decimal_t)
+        return -1;
+
+    if (!(array = PyImport_ImportModule("array")))
+        return -1;
+
+    wsql_array_t = PyObject_GetAttrString(array, "array");
+    Py_DECREF(array);
+    if (!wsql_array_t)
+        return -1;
+
+    if (!(constants = PyObject_GetAttrString(module, "constants")))
+        return -1;
+
+    if (PyModule_AddIntConstant(constants, "CODEC_BYTES", WSQL_CODEC_BYTES) < 0) goto error;
+    if (PyModule_AddIntConstant(constants, "CODEC_INT", WSQL_CODEC_INT) < 0) goto error;
+    if (PyModule_AddIntConstant(constants, "CODEC_FLOAT", WSQL_CODEC_FLOAT) < 0) goto error;
+    if (PyModule_AddIntConstant(constants, "CODEC_DECIMAL", WSQL_CODEC_DECIMAL) < 0) goto error;
+    if (PyModule_AddIntConstant(constants, "CODEC_DATE", WSQL_CODEC_DATE) < 0) goto error;
+    if (PyModule_AddIntConstant(constants, "CODEC_DATETIME", WSQL_CODEC_DATETIME) < 0) goto error;
+    if (PyModule_AddIntConstant(constants, "CODEC_TIME", WSQL_CODEC_TIME) < 0) goto error;
+    if (PyModule_AddIntConstant(constants, "CODEC_STRING", WSQL_CODEC_STRING) < 0) goto error;
+
+    Py_DECREF(constants);
+    return 0;
+
+  error:
+    Py_DECREF(constants);
+    return -1;
+}
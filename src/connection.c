@@ -20,6 +20,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 #include "connection.h"
 #include "result.h"
+#include "statement.h"
 
 const char wsql_connect__doc__[] =
 "Returns a WSQL connection. Exclusive use of keyword parameters strongly recommended.\n" \
@@ -38,6 +39,7 @@ const char wsql_connect__doc__[] =
 "param read_default_group: see the MySQL documentation for mysql_options()\n" \
 "param client_flag: client flags from MySQLdb.constants.CLIENT\n" \
 "param load_infile: non-zero enables LOAD LOCAL INFILE, zero disables\n" \
+"param charset: the character set of connection, that is negotiated on handshake\n" \
 "\n";
 
 
@@ -47,7 +49,7 @@ int wsql_connection__init__(wsql_connection *self, PyObject *args, PyObject *kwa
         "host", "user", "password", "database",
         "port", "socket_name", "connect_timeout", "compress",
         "init_command", "read_default_file", "read_default_group", "client_flag",
-        "ssl", "local_infile", "nonblocking", NULL
+        "ssl", "local_infile", "nonblocking", "charset", NULL
     };
 
     TRACE1("%p", self);
@@ -59,22 +61,22 @@ int wsql_connection__init__(wsql_connection *self, PyObject *args, PyObject *kwa
 #endif
     char *host = NULL, *user = NULL, *password = NULL,
          *database = NULL, *socket_name = NULL,
-         *init_command=NULL, *read_default_file=NULL, *read_default_group=NULL;
+         *init_command=NULL, *read_default_file=NULL, *read_default_group=NULL,
+         *charset=NULL;
 
     unsigned int port = 0, client_flag = 0, connect_timeout = 0;
     int nonblocking = 0, compress = -1, local_infile = -1;
 
     self->open = 0;
-    self->autocommit = 0;
     self->connected = 0;
     CHECK_SERVER(-1);
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|ssssIsIisssIOii:connect",
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|ssssIsIisssIOiiz:connect",
                      kwlist,
                      &host, &user, &password, &database,
                      &port, &socket_name, &connect_timeout, &compress,
                      &init_command, &read_default_file, &read_default_group,
-                     &client_flag, &ssl, &local_infile, &nonblocking))
+                     &client_flag, &ssl, &local_infile, &nonblocking, &charset))
     {
         return -1;
     }
@@ -130,6 +132,8 @@ int wsql_connection__init__(wsql_connection *self, PyObject *args, PyObject *kwa
             mysql_options(conn, MYSQL_READ_DEFAULT_GROUP, read_default_group);
         if (local_infile != -1)
             mysql_options(conn, MYSQL_OPT_LOCAL_INFILE, (char *) &local_infile);
+        if (charset != NULL)
+            mysql_options(conn, MYSQL_SET_CHARSET_NAME, charset);
 
     #ifdef _WIN32
         if (socket_name != NULL)
@@ -156,8 +160,6 @@ int wsql_connection__init__(wsql_connection *self, PyObject *args, PyObject *kwa
             conn = mysql_real_connect(conn, host, user, password, database, port, socket_name, client_flag);
         }
     }
-
-    self->autocommit = self->connection.server_capabilities & CLIENT_TRANSACTIONS ? 1 : 0;
     Py_END_ALLOW_THREADS ;
 
     if (conn == NULL)
@@ -298,12 +300,14 @@ static PyObject* wsql_connection_dump_debug_info(wsql_connection *self)
 }
 
 static const char wsql_connection_autocommit__doc__[] =
-"The autocommit mode. True means enable; False means disable.\n";
+"The autocommit mode. True means enable; False means disable.\n" \
+"The mode is read from the status of last server reply, so it also reflects\n" \
+"the SET autocommit statements.\n";
 
 static PyObject* wsql_connection_get_autocommit(wsql_connection *self, void* closure)
 {
     CHECK_CONNECTION(self, NULL);
-    return PyBool_FromLong(self->autocommit);
+    return PyBool_FromLong(self->connection.server_status & SERVER_STATUS_AUTOCOMMIT);
 }
 
 static int wsql_connection_set_autocommit(wsql_connection *self, PyObject *value, void *closure)
@@ -330,7 +334,6 @@ static int wsql_connection_set_autocommit(wsql_connection *self, PyObject *value
         wsql_raise_error(self);
         return -1;
     }
-    self->autocommit = flag ? 1 : 0;
     return 0;
 }
 
@@ -768,6 +771,27 @@ static PyObject* wsql_connection_ping(wsql_connection *self, PyObject *args)
     Py_RETURN_NONE;
 }
 
+#if MYSQL_VERSION_ID >= 50703
+static const char wsql_connection_reset_connection__doc__[] =
+"Resets the connection to clear the session state, the connection is not reconnected.\n" \
+"The active transaction is rolled back, the temporary tables and the prepared statements\n" \
+"are dropped, the session variables are reset to the global values.\n" \
+"Non-standard.\n";
+
+static PyObject* wsql_connection_reset_connection(wsql_connection *self)
+{
+    int error;
+    CHECK_CONNECTION(self, NULL);
+    Py_BEGIN_ALLOW_THREADS
+    error = mysql_reset_connection(&(self->connection));
+    Py_END_ALLOW_THREADS
+    if (error)
+        return wsql_raise_error(self);
+
+    Py_RETURN_NONE;
+}
+#endif
+
 static const char wsql_connection_query__doc__[] =
 "Execute a query. store_result() or use_result() will get the result set, if any.\n" \
 "Use cursor() to create a cursor, then cursor.execute().\n" \
@@ -792,6 +816,21 @@ static PyObject* wsql_connection_query(wsql_connection *self, PyObject *args)
     Py_RETURN_NONE;
 }
 
+static const char wsql_connection_prepare__doc__[] =
+"prepare(query) -- Prepares the server-side statement, the parameters are marked by '?'.\n" \
+"Returns the statement object, that can be executed several times.\n" \
+"Non-standard.\n";
+
+static PyObject* wsql_connection_prepare(wsql_connection *self, PyObject *args)
+{
+    char *query;
+    Py_ssize_t query_size;
+    if (!PyArg_ParseTuple(args, "s#:prepare", &query, &query_size))
+        return NULL;
+
+    return wsql_statement_new(self, query, query_size);
+}
+
 static const char wsql_connection_select_db__doc__[] =
 "Causes the database specified by db to become the default\n" \
 "(current) database on the connection specified by mysql.\n" \
@@ -1000,6 +1039,34 @@ static PyObject* wsql_connection_next_result_async(wsql_connection *self)
     return Py_BuildValue("(ii)", (int)status, !error);
 }
 
+static const char wsql_connection_store_result_async__doc__[] =
+"Read the whole result set into the client buffer in a non-blocking manner.\n" \
+"Returns a tuple of (status, result). If status is NET_ASYNC_NOT_READY,\n" \
+"the descriptor should be waited on and this function called again.\n" \
+"Otherwise, status is NET_ASYNC_COMPLETE, and result is the stored result,\n" \
+"or None if the query does not return rows.\n" \
+"The rows of stored result are fetched without I/O, so fetch_row() does not block.\n";
+
+static PyObject* wsql_connection_store_result_async(wsql_connection *self)
+{
+    MYSQL_RES *result = NULL;
+    net_async_status status;
+    PyObject *value;
+
+    CHECK_CONNECTION(self, NULL);
+    status = mysql_store_result_nonblocking(&(self->connection), &result);
+    if (status == NET_ASYNC_NOT_READY)
+        return Py_BuildValue("(iO)", (int)status, Py_None);
+
+    if (!result && mysql_errno(&(self->connection)))
+        return wsql_raise_error(self);
+
+    if (!(value = wsql_result_new(self, result, 0)))
+        return NULL;
+
+    return Py_BuildValue("(iN)", (int)status, value);
+}
+
 static const char wsql_connection_select_db_async__doc__[] =
 "Causes the database specified by db to become the default\n" \
 "(current) database on the connection specified by mysql. In subsequent\n" \
@@ -1029,6 +1096,28 @@ static PyObject* wsql_connection_select_db_async(wsql_connection *self, PyObject
     return Py_BuildValue("(iO)", (int)status, Py_None);
 }
 
+#if MYSQL_VERSION_ID >= 80016
+/* mysql_reset_connection_nonblocking reports errors by mysql_errno, unlike the older *_nonblocking calls */
+static const char wsql_connection_reset_connection_async__doc__[] =
+"Resets the connection to clear the session state in a non-blocking manner.\n" \
+"Returns a status.  Keep calling this function to complete the reset;\n" \
+"If status is NET_ASYNC_NOT_READY, the descriptor should be waited.\n" \
+"Otherwise, status is NET_ASYNC_COMPLETE, and the reset is complete.\n" \
+"Non-standard. (async version)\n";
+
+static PyObject* wsql_connection_reset_connection_async(wsql_connection *self)
+{
+    net_async_status status;
+    CHECK_CONNECTION(self, NULL);
+    status = mysql_reset_connection_nonblocking(&(self->connection));
+    if (status == NET_ASYNC_COMPLETE && mysql_errno(&(self->connection)))
+    {
+        return wsql_raise_error(self);
+    }
+    return Py_BuildValue("(iO)", (int)status, Py_None);
+}
+#endif
+
 #endif //HAVE_ASYNCIO
 
 
@@ -1153,6 +1242,20 @@ static PyMethodDef wsql_connection_methods[] = {
         METH_VARARGS,
         wsql_connection_ping__doc__
     },
+#if MYSQL_VERSION_ID >= 50703
+    {
+        "reset_connection",
+        (PyCFunction)wsql_connection_reset_connection,
+        METH_NOARGS,
+        wsql_connection_reset_connection__doc__
+    },
+#endif
+    {
+        "prepare",
+        (PyCFunction)wsql_connection_prepare,
+        METH_VARARGS,
+        wsql_connection_prepare__doc__
+    },
     {
         "query",
         (PyCFunction)wsql_connection_query,
@@ -1196,6 +1299,20 @@ static PyMethodDef wsql_connection_methods[] = {
         METH_VARARGS,
         wsql_connection_select_db_async__doc__
     },
+#if MYSQL_VERSION_ID >= 80016
+    {
+        "reset_connection_async",
+        (PyCFunction)wsql_connection_reset_connection_async,
+        METH_NOARGS,
+        wsql_connection_reset_connection_async__doc__
+    },
+#endif
+    {
+        "store_result_async",
+        (PyCFunction)wsql_connection_store_result_async,
+        METH_NOARGS,
+        wsql_connection_store_result_async__doc__
+    },
     {
         "next_result_async",
         (PyCFunction)wsql_connection_next_result_async,
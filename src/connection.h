@@ -33,7 +33,6 @@ typedef struct {
     PyObject_HEAD
     MYSQL connection;
     int open;
-    int autocommit;
     int connected;
 } wsql_connection;
 
@@ -43,6 +42,8 @@ extern PyObject* wsql_connect(PyObject *self, PyObject *args, PyObject *kwargs);
 
 extern PyObject* wsql_raise_error(wsql_connection *c);
 
+extern PyObject* wsql_raise_stmt_error(wsql_connection *c, MYSQL_STMT *stmt);
+
 extern int wsql_server_init_done;
 
 #if MYSQL_VERSION_ID >= 40000
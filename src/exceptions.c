@@ -109,6 +109,20 @@ PyObject* wsql_raise_error(wsql_connection *c)
     return wsql_set_exception(NULL, error_code, mysql_error(&(c->connection)));
 }
 
+PyObject* wsql_raise_stmt_error(wsql_connection *c, MYSQL_STMT *stmt)
+{
+    int error_code = mysql_stmt_errno(stmt);
+
+    TRACE2("%p, %d", c, error_code);
+    if (is_connection_lost(error_code))
+        c->connected = 0;
+
+    if (!error_code)
+        return wsql_set_exception(wsql_interface_error, -1, "unknown error");
+
+    return wsql_set_exception(NULL, error_code, mysql_stmt_error(stmt));
+}
+
 PyObject* wsql_check_error_code(PyObject* args, bool (*checker)(int))
 {
     int result = 0;
@@ -142,6 +156,14 @@ PyObject* wsql_is_deadlock_error(PyObject* self, PyObject* args)
     return wsql_check_error_code(args, &is_deadlock);
 }
 
+const char wsql_is_connection_lost_error__doc__[] =
+"Return True if error means lost connection to server, otherwise False\n";
+
+PyObject* wsql_is_connection_lost_error(PyObject* self, PyObject* args)
+{
+    return wsql_check_error_code(args, &is_connection_lost);
+}
+
 const char wsql_exceptions__doc__[] =
 "All Exceptions according to DB API 2.0\n";
 
@@ -158,6 +180,12 @@ static PyMethodDef wsql_exceptions_methods[] = {
         METH_VARARGS,
         wsql_is_deadlock_error__doc__
     },
+    {
+        "is_connection_lost",
+        (PyCFunction)wsql_is_connection_lost_error,
+        METH_VARARGS,
+        wsql_is_connection_lost_error__doc__
+    },
     {NULL, NULL} /* sentinel */
 };
 
@@ -19,6 +19,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 */
 
 #include "format.h"
+#include "common.h"
 
 // added local support for formatting bytes
 // original pep  460
@@ -60,9 +61,18 @@ static int wsql_format_write_char(struct wsql_formatter_t* ctx, char c) {
     return 0;
 }
 
+static int wsql_format_write_data(struct wsql_formatter_t* ctx, const char *data, Py_ssize_t len) {
+    if (ctx->out_pos + len > ctx->out_len && wsql_format_resize_output(ctx, (ctx->out_len + len) << 1) < 0)
+      return -1;
+
+    memcpy(ctx->out_data + ctx->out_pos, data, len);
+    ctx->out_pos += len;
+    return 0;
+}
+
 static int wsql_format_write_object(struct wsql_formatter_t* ctx, PyObject* o) {
     PyObject* bytes = NULL;
-    Py_ssize_t i;
+    int ret;
 
     if (PyLong_Check(o))
     {
@@ -93,18 +103,9 @@ static int wsql_format_write_object(struct wsql_formatter_t* ctx, PyObject* o) {
     if (bytes == NULL)
         return -1;
 
-    Py_ssize_t len = PyBytes_GET_SIZE(bytes);
-
-    if (ctx->out_pos + len > ctx->out_len && wsql_format_resize_output(ctx, (ctx->out_len + len) << 1) < 0)
-      return -1;
-
-    char* data = PyBytes_AS_STRING(bytes);
-
-    for (i = 0; i < len; ++i, ++ctx->out_pos)
-        ctx->out_data[ctx->out_pos] = data[i];
-
+    ret = wsql_format_write_data(ctx, PyBytes_AS_STRING(bytes), PyBytes_GET_SIZE(bytes));
     Py_DECREF(bytes);
-    return 0;
+    return ret;
 }
 
 static PyObject* wsql_format_next_arg(struct wsql_formatter_t *ctx)
@@ -431,3 +432,422 @@ PyObject* wsql_format(PyObject *self, PyObject *args)
     Py_XDECREF(ctx.output);
     return NULL;
 }
+
+/* The compiled template, the format string is split once to literal segments
+   and placeholders, so the template can be rendered many times without parsing */
+
+struct wsql_template_segment_t {
+    Py_ssize_t offset, length;  /* the literal before placeholder */
+    char ch;                    /* the conversion of placeholder or 0 */
+};
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *query;
+    struct wsql_template_segment_t *segments;
+    Py_ssize_t num_segments;
+    Py_ssize_t num_args;
+    Py_ssize_t size_hint;       /* the size of last rendered query */
+} wsql_template;
+
+/* writes the template formatted with args to output of ctx */
+static int wsql_template_write(wsql_template *self, struct wsql_formatter_t *ctx, PyObject *args)
+{
+    struct wsql_format_arg_t arg;
+    struct wsql_template_segment_t *segment;
+    Py_ssize_t i;
+
+    if (!PyTuple_Check(args))
+    {
+        PyErr_SetString(PyExc_TypeError, "arguments should be tuple");
+        return -1;
+    }
+
+    ctx->args = args;
+    ctx->args_pos = 0;
+    ctx->args_len = PyTuple_GET_SIZE(args);
+
+    for (i = 0; i < self->num_segments; ++i)
+    {
+        segment = &(self->segments[i]);
+        if (wsql_format_write_data(ctx, ctx->fmt_data + segment->offset, segment->length) < 0)
+            return -1;
+
+        if (segment->ch)
+        {
+            arg.ch = segment->ch;
+            arg.sign = 0;
+            if (wsql_format_arg_format(ctx, &arg) < 0)
+                return -1;
+        }
+    }
+
+    if (ctx->args_pos < ctx->args_len)
+    {
+        PyErr_SetString(PyExc_TypeError, "not all arguments converted during string formatting");
+        return -1;
+    }
+    return 0;
+}
+
+static int wsql_template_init_context(wsql_template *self, struct wsql_formatter_t *ctx, Py_ssize_t size)
+{
+    ctx->args = NULL;
+    ctx->args_pos = 0;
+    ctx->args_len = 0;
+
+    ctx->fmt = self->query;
+    ctx->fmt_data = PyBytes_AS_STRING(self->query);
+    ctx->fmt_len = PyBytes_GET_SIZE(self->query);
+    ctx->fmt_pos = 0;
+
+    if (size < 16)
+        size = 16;
+
+    ctx->out_pos = 0;
+    if (!(ctx->output = PyBytes_FromStringAndSize(NULL, size)))
+        return -1;
+
+    ctx->out_data = PyBytes_AS_STRING(ctx->output);
+    ctx->out_len = PyBytes_GET_SIZE(ctx->output);
+    return 0;
+}
+
+static PyObject* wsql_template_finish_context(struct wsql_formatter_t *ctx)
+{
+    if (ctx->out_pos != ctx->out_len && _PyBytes_Resize(&(ctx->output), ctx->out_pos) < 0)
+        return NULL;
+    return ctx->output;
+}
+
+/* the expected size of the rendered template */
+static Py_ssize_t wsql_template_size_hint(wsql_template *self)
+{
+    Py_ssize_t size = PyBytes_GET_SIZE(self->query) << 1;
+    return size < self->size_hint ? self->size_hint : size;
+}
+
+static const char wsql_template_render__doc__[] =
+"render(args) -- format query with arguments, args should be tuple.\n";
+
+static PyObject* wsql_template_render(wsql_template *self, PyObject *args)
+{
+    struct wsql_formatter_t ctx;
+    PyObject *values;
+
+    if (!PyArg_ParseTuple(args, "O:render", &values))
+        return NULL;
+
+    /* the output is pre-sized by the previous render */
+    if (wsql_template_init_context(self, &ctx, wsql_template_size_hint(self)) < 0)
+        return NULL;
+
+    if (wsql_template_write(self, &ctx, values) < 0)
+        goto on_error;
+
+    self->size_hint = ctx.out_pos;
+    return wsql_template_finish_context(&ctx);
+
+  on_error:
+    Py_XDECREF(ctx.output);
+    return NULL;
+}
+
+static const char wsql_template_render_many__doc__[] =
+"render_many(rows, prefix=b'', suffix=b'', separator=b',', max_size=-1) -- format\n" \
+"the template with each row of arguments and join them by separator into a single\n" \
+"query between prefix and suffix, each row should be tuple.\n" \
+"If max_size is not negative, the rendering stops before the row, that does not fit\n" \
+"into max_size bytes, and the tuple of (query, row) is returned, the row is None\n" \
+"if all rows have been rendered and query is None if there are no rows.\n" \
+"The query contains at least one row even if it does not fit into max_size.\n";
+
+static PyObject* wsql_template_render_many(wsql_template *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"rows", "prefix", "suffix", "separator", "max_size", NULL};
+    struct wsql_formatter_t ctx;
+    PyObject *rows, *prefix = NULL, *suffix = NULL, *separator = NULL;
+    PyObject *iterator = NULL, *row = NULL, *query, *result;
+    Py_ssize_t count, size, mark, suffix_len, max_size = -1;
+
+    ctx.output = NULL;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|SSSn:render_many", kwlist, &rows, &prefix, &suffix, &separator, &max_size))
+        return NULL;
+
+    if (!(iterator = PyObject_GetIter(rows)))
+        return NULL;
+
+    if ((count = PyObject_LengthHint(rows, 0)) < 0)
+        goto on_error;
+
+    suffix_len = suffix ? PyBytes_GET_SIZE(suffix) : 0;
+    size = (wsql_template_size_hint(self) + (separator ? PyBytes_GET_SIZE(separator) : 1)) * count;
+    size += (prefix ? PyBytes_GET_SIZE(prefix) : 0) + suffix_len;
+    if (max_size >= 0 && size > max_size)
+        size = max_size;
+
+    if (wsql_template_init_context(self, &ctx, size) < 0)
+        goto on_error;
+
+    if (prefix && wsql_format_write_data(&ctx, PyBytes_AS_STRING(prefix), PyBytes_GET_SIZE(prefix)) < 0)
+        goto on_error;
+
+    for (count = 0; (row = PyIter_Next(iterator)); ++count)
+    {
+        mark = ctx.out_pos;
+        if (count > 0)
+        {
+            if (separator)
+            {
+                if (wsql_format_write_data(&ctx, PyBytes_AS_STRING(separator), PyBytes_GET_SIZE(separator)) < 0)
+                    goto on_error;
+            }
+            else if (wsql_format_write_char(&ctx, ',') < 0)
+            {
+                goto on_error;
+            }
+        }
+
+        if (wsql_template_write(self, &ctx, row) < 0)
+            goto on_error;
+
+        if (max_size >= 0 && count > 0 && ctx.out_pos + suffix_len > max_size)
+        {
+            /* the row does not fit, it is returned to caller */
+            ctx.out_pos = mark;
+            break;
+        }
+
+        Py_CLEAR(row);
+    }
+
+    if (PyErr_Occurred())
+        goto on_error;
+
+    Py_CLEAR(iterator);
+
+    if (max_size < 0)
+    {
+        if (suffix && wsql_format_write_data(&ctx, PyBytes_AS_STRING(suffix), suffix_len) < 0)
+            goto on_error;
+
+        return wsql_template_finish_context(&ctx);
+    }
+
+    if (count == 0)
+    {
+        Py_CLEAR(ctx.output);
+        query = Py_None;
+        Py_INCREF(query);
+    }
+    else
+    {
+        if (suffix && wsql_format_write_data(&ctx, PyBytes_AS_STRING(suffix), suffix_len) < 0)
+            goto on_error;
+
+        if (!(query = wsql_template_finish_context(&ctx)))
+            goto on_error;
+    }
+
+    result = Py_BuildValue("(NO)", query, row ? row : Py_None);
+    Py_XDECREF(row);
+    return result;
+
+  on_error:
+    Py_XDECREF(row);
+    Py_XDECREF(iterator);
+    Py_XDECREF(ctx.output);
+    return NULL;
+}
+
+static void wsql_template_dealloc(wsql_template *self)
+{
+    Py_XDECREF(self->query);
+    PyMem_Free(self->segments);
+    Py_FREE(self);
+}
+
+static PyObject* wsql_template_repr(wsql_template *self)
+{
+    return PyString_FromFormat("<" STRINGIFY(MODULE_NAME) ".Template %R>", self->query);
+}
+
+static PyMethodDef wsql_template_methods[] = {
+    {
+        "render",
+        (PyCFunction)wsql_template_render,
+        METH_VARARGS,
+        wsql_template_render__doc__
+    },
+    {
+        "render_many",
+        (PyCFunction)wsql_template_render_many,
+        METH_VARARGS | METH_KEYWORDS,
+        wsql_template_render_many__doc__
+    },
+    {NULL, NULL} /* sentinel */
+};
+
+static struct PyMemberDef wsql_template_members[] = {
+    {
+        "query",
+        T_OBJECT,
+        offsetof(wsql_template, query),
+        READONLY,
+        "The source format string"
+    },
+    {
+        "num_args",
+        T_PYSSIZET,
+        offsetof(wsql_template, num_args),
+        READONLY,
+        "The number of arguments"
+    },
+    {NULL} /* Sentinel */
+};
+
+static const char wsql_template__doc__[] =
+"The compiled query template, use compile(query) to create it.";
+
+PyTypeObject wsql_template_t = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    STRINGIFY(MODULE_NAME) ".Template",  /* tp_name */
+    sizeof(wsql_template),               /* tp_basicsize */
+    0,                                   /* tp_itemsize */
+    (destructor)wsql_template_dealloc,   /* tp_dealloc */
+    0,                                   /* tp_print */
+    0,                                   /* tp_getattr */
+    0,                                   /* tp_setattr */
+    0,                                   /* tp_reserved */
+    (reprfunc)wsql_template_repr,        /* tp_repr */
+    0,                                   /* tp_as_number */
+    0,                                   /* tp_as_sequence */
+    0,                                   /* tp_as_mapping */
+    0,                                   /* tp_hash  */
+    0,                                   /* tp_call */
+    0,                                   /* tp_str */
+    0,                                   /* tp_getattro */
+    0,                                   /* tp_setattro */
+    0,                                   /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                  /* tp_flags */
+    wsql_template__doc__,                /* tp_doc */
+    0,                                   /* tp_traverse */
+    0,                                   /* tp_clear */
+    0,                                   /* tp_richcompare */
+    0,                                   /* tp_weaklistoffset */
+    0,                                   /* tp_iter */
+    0,                                   /* tp_iternext */
+    wsql_template_methods,               /* tp_methods */
+    wsql_template_members,               /* tp_members */
+    0,                                   /* tp_getset */
+    0,                                   /* tp_base */
+    0,                                   /* tp_dict */
+    0,                                   /* tp_descr_get */
+    0,                                   /* tp_descr_set */
+    0,                                   /* tp_dictoffset */
+    0,                                   /* tp_init */
+    PyType_GenericAlloc,                 /* tp_alloc */
+    0,                                   /* tp_new */
+    PyObject_Del                         /* tp_del */
+};
+
+char wsql_compile__doc__[] =
+"compile(query) -- split query to literals and placeholders once,\n" \
+"returns Template, that formats query like format.\n" \
+"Non-standard.\n";
+
+PyObject* wsql_compile(PyObject *self, PyObject *args)
+{
+    PyObject *query;
+    wsql_template *template;
+    const char *data;
+    Py_ssize_t i, n, start, length, count;
+    char ch;
+
+    if (!PyArg_ParseTuple(args, "O:compile", &query))
+        return NULL;
+
+    if (!PyBytes_Check(query))
+    {
+        PyErr_SetString(PyExc_TypeError, "format should be bytes");
+        return NULL;
+    }
+
+    data = PyBytes_AS_STRING(query);
+    length = PyBytes_GET_SIZE(query);
+
+    /* every placeholder ends a segment */
+    for (i = 0, count = 1; i < length; ++i)
+    {
+        if (data[i] == '%')
+            ++count;
+    }
+
+    if (!(template = Py_ALLOC(wsql_template, wsql_template_t)))
+        return NULL;
+
+    template->query = query;
+    Py_INCREF(query);
+    template->num_segments = 0;
+    template->num_args = 0;
+    template->size_hint = 0;
+
+    if (!(template->segments = PyMem_New(struct wsql_template_segment_t, count)))
+    {
+        PyErr_NoMemory();
+        goto on_error;
+    }
+
+    for (i = 0, n = 0, start = 0; i < length; ++i)
+    {
+        if (data[i] != '%')
+            continue;
+
+        ch = (i + 1 < length) ? data[i + 1] : '\0';
+        switch (ch)
+        {
+        case 's':
+        case 'i':
+        case 'd':
+        case 'u':
+        case 'o':
+        case 'x':
+        case 'X':
+        case 'e':
+        case 'E':
+        case 'f':
+        case 'F':
+        case 'g':
+        case 'G':
+            ++template->num_args;
+            /* fall through */
+        case '%':
+            break;
+        default:
+            PyErr_Format(PyExc_ValueError,
+                         "unsupported format character '%c' (0x%x) "
+                         "at index %zd",
+                         (31 <= ch && ch <= 126) ? ch : '?',
+                         (int)ch,
+                         i + 1);
+            goto on_error;
+        }
+
+        template->segments[n].offset = start;
+        template->segments[n].length = i - start;
+        template->segments[n].ch = ch;
+        ++n;
+        start = ++i + 1;
+    }
+
+    template->segments[n].offset = start;
+    template->segments[n].length = length - start;
+    template->segments[n].ch = 0;
+    template->num_segments = n + 1;
+    return (PyObject *)template;
+
+  on_error:
+    Py_DECREF(template);
+    return NULL;
+}
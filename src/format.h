@@ -27,4 +27,10 @@ extern char wsql_format__doc__[];
 
 extern PyObject* wsql_format(PyObject *self, PyObject *args);
 
+extern PyTypeObject wsql_template_t;
+
+extern char wsql_compile__doc__[];
+
+extern PyObject* wsql_compile(PyObject *self, PyObject *args);
+
 #endif // __WSQL_FORMAT_H__
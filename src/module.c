@@ -18,11 +18,13 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 */
 
+#include "codec.h"
 #include "connection.h"
 #include "field.h"
 #include "format.h"
 #include "module.h"
 #include "result.h"
+#include "statement.h"
 
 
 int wsql_server_init_done = 0;
@@ -222,6 +224,12 @@ static PyMethodDef wsql_methods[] = {
         METH_VARARGS,
         wsql_format__doc__
     },
+    {
+        "compile",
+        (PyCFunction)wsql_compile,
+        METH_VARARGS,
+        wsql_compile__doc__
+    },
     {NULL, NULL} /* sentinel */
 };
 
@@ -268,6 +276,8 @@ PYENTRY_FUNC_NAME(void)
     if (PyType_Ready(&wsql_connection_t) < 0) goto on_error;
     if (PyType_Ready(&wsql_result_t) < 0) goto on_error;
     if (PyType_Ready(&wsql_field_t) < 0) goto on_error;
+    if (PyType_Ready(&wsql_template_t) < 0) goto on_error;
+    if (PyType_Ready(&wsql_statement_t) < 0) goto on_error;
 
     /* Module constants */
     if (PyModule_AddObject(module, "version_info",
@@ -280,6 +290,7 @@ PYENTRY_FUNC_NAME(void)
 
     if (wsql_exceptions_init(module) < 0) goto on_error;
     if (wsql_constants_init(module) < 0) goto on_error;
+    if (wsql_codecs_init(module) < 0) goto on_error;
 
     PY_MOD_RETURN(module);
 
@@ -37,8 +37,14 @@ typedef struct {
     int use;
     int more_rows;
     PyObject *fields;
+    PyObject *description;
+    PyObject *names;
+    PyObject *decoders;
+    int *codecs;
+    PyObject *columns;
 } wsql_result;
 
 extern int wsql_result__init__(wsql_result *self, PyObject *args, PyObject *kwargs);
+extern PyObject* wsql_result_new(wsql_connection *connection, MYSQL_RES *result, int use);
 
 #endif //__WSQL_RESULT_H__
@@ -20,6 +20,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 #include "result.h"
 #include "field.h"
+#include "codec.h"
 
 static PyObject* wsql_result_get_fields(wsql_result *self, unsigned int num_fields)
 {
@@ -71,26 +72,13 @@ static const char wsql_result__doc__[] =
 "If using wsql.Connection, this is done by the cursor class.\n" \
 "Just forget you ever saw this. Forget... FOR-GET...";
 
-int wsql_result__init__(wsql_result *self, PyObject *args, PyObject *kwargs)
+static int wsql_result_attach(wsql_result *self, wsql_connection *connection, MYSQL_RES *result, int use)
 {
-    static char *kwlist[] = {"connection", "use", NULL};
-    MYSQL_RES *result;
-    wsql_connection *connection = NULL;
-    int use = 0;
     unsigned int n;
 
-    TRACE1("%p", self);
-
-    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|i", kwlist, &connection, &use))
-        return -1;
-
-    Py_BEGIN_ALLOW_THREADS ;
-    result = use ? mysql_use_result(&(connection->connection)) : mysql_store_result(&(connection->connection));
     self->result = result;
     self->more_rows = result ? 1 : 0;
     self->use = use;
-    Py_END_ALLOW_THREADS;
-
     self->connection = (PyObject *) connection;
     Py_INCREF(self->connection);
 
@@ -108,6 +96,50 @@ int wsql_result__init__(wsql_result *self, PyObject *args, PyObject *kwargs)
     return 0;
 }
 
+int wsql_result__init__(wsql_result *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"connection", "use", NULL};
+    MYSQL_RES *result;
+    wsql_connection *connection = NULL;
+    int use = 0;
+
+    TRACE1("%p", self);
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "O|i", kwlist, &connection, &use))
+        return -1;
+
+    Py_BEGIN_ALLOW_THREADS ;
+    result = use ? mysql_use_result(&(connection->connection)) : mysql_store_result(&(connection->connection));
+    Py_END_ALLOW_THREADS;
+
+    return wsql_result_attach(self, connection, result, use);
+}
+
+PyObject* wsql_result_new(wsql_connection *connection, MYSQL_RES *result, int use)
+{
+    wsql_result *self;
+
+    if (!(self = Py_ALLOC(wsql_result, wsql_result_t)))
+    {
+        if (result)
+            mysql_free_result(result);
+        return NULL;
+    }
+
+    if (wsql_result_attach(self, connection, result, use) < 0)
+    {
+        Py_DECREF(self);
+        return NULL;
+    }
+
+    if (!(self->result))
+    {
+        Py_DECREF(self);
+        Py_RETURN_NONE;
+    }
+    return (PyObject*)self;
+}
+
 static char wsql_result_description__doc__[] =
 "the sequence of 7-tuples required by the DB-API for\n" \
 "the Cursor.description attribute.\n";
@@ -120,6 +152,12 @@ static PyObject* wsql_result_get_description(wsql_result *self, void* closure)
 
     CHECK_RESULT(self, NULL);
 
+    if (self->description)
+    {
+        Py_INCREF(self->description);
+        return self->description;
+    }
+
     n = self->num_fields;
 
     if (!(result = PyTuple_New(n)))
@@ -142,6 +180,9 @@ static PyObject* wsql_result_get_description(wsql_result *self, void* closure)
 
         PyTuple_SET_ITEM(result, i, field_desc);
     }
+
+    Py_INCREF(result);
+    self->description = result;
     return result;
 
   on_error:
@@ -149,6 +190,85 @@ static PyObject* wsql_result_get_description(wsql_result *self, void* closure)
     return NULL;
 }
 
+static char wsql_result_names__doc__[] =
+"the tuple of column names, the names are interned strings.\n";
+
+static PyObject* wsql_result_get_names(wsql_result *self, void* closure)
+{
+    PyObject *result, *name;
+    MYSQL_FIELD *fields;
+    unsigned int i, n;
+
+    CHECK_RESULT(self, NULL);
+
+    if (self->names)
+    {
+        Py_INCREF(self->names);
+        return self->names;
+    }
+
+    n = self->num_fields;
+
+    if (!(result = PyTuple_New(n)))
+        return NULL;
+
+    fields = mysql_fetch_fields(self->result);
+
+    for (i=0; i<n; ++i) {
+        if (!(name = PyUnicode_InternFromString(fields[i].name)))
+        {
+            Py_DECREF(result);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(result, i, name);
+    }
+
+    Py_INCREF(result);
+    self->names = result;
+    return result;
+}
+
+
+static PyObject* wsql_result_decode_value(wsql_result *self, unsigned int i, const char *data, unsigned long length)
+{
+    int codec = self->codecs ? self->codecs[i] : WSQL_CODEC_BYTES;
+    PyObject *value, *decoded;
+
+    if (codec == WSQL_CODEC_CALL)
+    {
+        if (data)
+        {
+            if (!(value = PyBytes_FromStringAndSize(data, length)))
+                return NULL;
+        }
+        else /* NULL */
+        {
+            value = Py_None;
+            Py_INCREF(value);
+        }
+        decoded = PyObject_CallFunctionObjArgs(PyTuple_GET_ITEM(self->decoders, i), value, NULL);
+        Py_DECREF(value);
+        return decoded;
+    }
+
+    if (!data)
+        Py_RETURN_NONE;
+
+    return wsql_decode_value(codec, data, length);
+}
+
+/* checks the reason of end of rows, returns -1 if there is error */
+static int wsql_result_end_of_rows(wsql_result *self)
+{
+    if (mysql_errno(&(RESULT_CONNECTION(self)->connection)))
+    {
+        wsql_raise_error(RESULT_CONNECTION(self));
+        return -1;
+    }
+
+    self->more_rows = 0;
+    return 0;
+}
 
 static PyObject* wsql_result_convert_row(wsql_result *self, MYSQL_ROW row)
 {
@@ -158,10 +278,8 @@ static PyObject* wsql_result_convert_row(wsql_result *self, MYSQL_ROW row)
 
     if (!row)
     {
-      if (mysql_errno(&(RESULT_CONNECTION(self)->connection)))
-        return wsql_raise_error(RESULT_CONNECTION(self));
-
-      self->more_rows = 0;
+      if (wsql_result_end_of_rows(self) < 0)
+        return NULL;
       Py_RETURN_NONE;
     }
 
@@ -173,16 +291,8 @@ static PyObject* wsql_result_convert_row(wsql_result *self, MYSQL_ROW row)
 
     for (i=0; i<n; ++i)
     {
-        if (row[i])
-        {
-            v = PyBytes_FromStringAndSize(row[i], length[i]);
-            if (!v) goto on_error;
-        }
-        else /* NULL */
-        {
-            v = Py_None;
-            Py_INCREF(v);
-        }
+        if (!(v = wsql_result_decode_value(self, i, row[i], length[i])))
+            goto on_error;
         PyTuple_SET_ITEM(result, i, v);
     }
     return result;
@@ -197,23 +307,343 @@ static const char wsql_result_fetch_row__doc__[] =
 "  NULL is returned as None.\n" \
 "  A single None indicates the end of the result set.\n";
 
+static MYSQL_ROW wsql_result_next_row(wsql_result *self)
+{
+    MYSQL_ROW row;
+
+    if (!self->use)
+    {
+        row = mysql_fetch_row(self->result);
+    }
+    else
+    {
+        Py_BEGIN_ALLOW_THREADS;
+        row = mysql_fetch_row(self->result);
+        Py_END_ALLOW_THREADS;
+    }
+    return row;
+}
+
 static PyObject* wsql_result_fetch_row(wsql_result *self)
 {
+    CHECK_RESULT(self, NULL);
+    return wsql_result_convert_row(self, wsql_result_next_row(self));
+}
+
+static const char wsql_result_fetch_rows__doc__[] =
+"fetch_rows(size=-1) -- Fetches up to size rows as a list of tuples.\n" \
+"  If size is negative, all remaining rows are fetched.\n" \
+"  An empty list indicates the end of the result set.\n";
+
+static PyObject* wsql_result_fetch_rows(wsql_result *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"size", NULL};
+    PyObject *rows = NULL, *row = NULL;
+    Py_ssize_t size = -1, i;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|n:fetch_rows", kwlist, &size))
+        return NULL;
+
+    CHECK_RESULT(self, NULL);
+
+    if (!(rows = PyList_New(0)))
+        return NULL;
+
+    for (i = 0; size < 0 || i < size; ++i)
+    {
+        if (!(row = wsql_result_convert_row(self, wsql_result_next_row(self))))
+            goto on_error;
+
+        if (row == Py_None)
+        {
+            Py_DECREF(row);
+            break;
+        }
+
+        if (PyList_Append(rows, row) < 0)
+            goto on_error;
+
+        Py_DECREF(row);
+    }
+    return rows;
+
+  on_error:
+    Py_XDECREF(row);
+    Py_DECREF(rows);
+    return NULL;
+}
+
+/* returns the typecode of array.array for column or 0 if column is stored to list */
+static char wsql_result_column_typecode(wsql_result *self, MYSQL_FIELD *fields, unsigned int i)
+{
+    if (!self->codecs || !IS_NOT_NULL(fields[i].flags))
+        return 0;
+
+    switch (self->codecs[i])
+    {
+    case WSQL_CODEC_INT:
+        return (fields[i].flags & UNSIGNED_FLAG) ? 'Q' : 'q';
+    case WSQL_CODEC_FLOAT:
+        return 'd';
+    default:
+        return 0;
+    }
+}
+
+static PyObject* wsql_result_new_columns(wsql_result *self)
+{
+    PyObject *columns, *column;
+    MYSQL_FIELD *fields;
+    unsigned int i, n;
+
+    n = self->num_fields;
+    if (!(columns = PyTuple_New(n)))
+        return NULL;
+
+    fields = mysql_fetch_fields(self->result);
+    for (i = 0; i < n; ++i)
+    {
+        if (wsql_result_column_typecode(self, fields, i))
+            column = PyByteArray_FromStringAndSize(NULL, 0);
+        else
+            column = PyList_New(0);
+
+        if (!column)
+        {
+            Py_DECREF(columns);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(columns, i, column);
+    }
+    return columns;
+}
+
+/* converts the raw buffer of column to list of values, if column contains NULL */
+static int wsql_result_column_to_list(wsql_result *self, PyObject *columns, MYSQL_FIELD *fields, unsigned int i)
+{
+    PyObject *array, *list;
+
+    if (!(array = wsql_new_array(wsql_result_column_typecode(self, fields, i), PyTuple_GET_ITEM(columns, i))))
+        return -1;
+
+    list = PySequence_List(array);
+    Py_DECREF(array);
+    if (!list)
+        return -1;
+
+    Py_DECREF(PyTuple_GET_ITEM(columns, i));
+    PyTuple_SET_ITEM(columns, i, list);
+    return 0;
+}
+
+static int wsql_result_append_columns(wsql_result *self, PyObject *columns, MYSQL_ROW row)
+{
+    PyObject *column, *v;
+    MYSQL_FIELD *fields;
+    unsigned long *length;
+    Py_ssize_t size;
+    unsigned int i, n;
+    int error;
+
+    n = self->num_fields;
+    fields = mysql_fetch_fields(self->result);
+    length = mysql_fetch_lengths(self->result);
+
+    for (i = 0; i < n; ++i)
+    {
+        column = PyTuple_GET_ITEM(columns, i);
+        if (PyByteArray_CheckExact(column) && !row[i])
+        {
+            /* the NOT NULL flag is not reliable, e.g. for outer joins */
+            if (wsql_result_column_to_list(self, columns, fields, i) < 0)
+                return -1;
+            column = PyTuple_GET_ITEM(columns, i);
+        }
+
+        if (PyByteArray_CheckExact(column))
+        {
+            size = PyByteArray_GET_SIZE(column);
+            /* all raw values have the same size - 8 bytes */
+            if (PyByteArray_Resize(column, size + sizeof(double)) < 0)
+                return -1;
+
+            if (wsql_decode_raw(self->codecs[i], fields[i].flags & UNSIGNED_FLAG, row[i], length[i], PyByteArray_AS_STRING(column) + size) < 0)
+                return -1;
+        }
+        else
+        {
+            if (!(v = wsql_result_decode_value(self, i, row[i], length[i])))
+                return -1;
+
+            error = PyList_Append(column, v);
+            Py_DECREF(v);
+            if (error < 0)
+                return -1;
+        }
+    }
+    return 0;
+}
+
+/* replaces the raw buffers by array.array objects */
+static PyObject* wsql_result_finish_columns(wsql_result *self, PyObject *columns)
+{
+    PyObject *column;
+    MYSQL_FIELD *fields;
+    unsigned int i, n;
+    char typecode;
+
+    n = self->num_fields;
+    fields = mysql_fetch_fields(self->result);
+
+    for (i = 0; i < n; ++i)
+    {
+        if (!PyByteArray_CheckExact(PyTuple_GET_ITEM(columns, i)))
+            continue;
+
+        typecode = wsql_result_column_typecode(self, fields, i);
+
+        if (!(column = wsql_new_array(typecode, PyTuple_GET_ITEM(columns, i))))
+            return NULL;
+
+        Py_DECREF(PyTuple_GET_ITEM(columns, i));
+        PyTuple_SET_ITEM(columns, i, column);
+    }
+    Py_INCREF(columns);
+    return columns;
+}
+
+static const char wsql_result_fetch_columns__doc__[] =
+"fetch_columns(size=-1) -- Fetches up to size rows as a tuple of columns.\n" \
+"  The NOT NULL columns with CODEC_INT or CODEC_FLOAT are returned as\n" \
+"  array.array of 64-bit values, the others columns are returned as lists.\n" \
+"  If size is negative, all remaining rows are fetched.\n";
+
+static PyObject* wsql_result_fetch_columns(wsql_result *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"size", NULL};
+    PyObject *columns = NULL, *result;
     MYSQL_ROW row;
+    Py_ssize_t size = -1, i;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|n:fetch_columns", kwlist, &size))
+        return NULL;
 
     CHECK_RESULT(self, NULL);
 
+    if (!(columns = wsql_result_new_columns(self)))
+        return NULL;
+
+    for (i = 0; size < 0 || i < size; ++i)
+    {
+        if (!(row = wsql_result_next_row(self)))
+        {
+            if (wsql_result_end_of_rows(self) < 0)
+                goto on_error;
+            break;
+        }
+
+        if (wsql_result_append_columns(self, columns, row) < 0)
+            goto on_error;
+    }
+
+    result = wsql_result_finish_columns(self, columns);
+    Py_DECREF(columns);
+    return result;
+
+  on_error:
+    Py_DECREF(columns);
+    return NULL;
+}
+
+static const char wsql_result_set_codecs__doc__[] =
+"set_codecs(codecs) -- Sets the decoders of columns.\n" \
+"  The codecs is a sequence with an item per column, the item is\n" \
+"  one of constants.CODEC_* to decode value natively,\n" \
+"  a callable that accepts bytes or None, or None to keep bytes.\n";
+
+static PyObject* wsql_result_set_codecs(wsql_result *self, PyObject *args)
+{
+    PyObject *codecs, *decoders = NULL, *item;
+    int *plan = NULL;
+    long codec;
+    Py_ssize_t i;
+
+    if (!PyArg_ParseTuple(args, "O:set_codecs", &codecs))
+        return NULL;
+
+    CHECK_RESULT(self, NULL);
+
+    if (!(decoders = PySequence_Tuple(codecs)))
+        return NULL;
+
+    if (PyTuple_GET_SIZE(decoders) != self->num_fields)
+    {
+        PyErr_SetString(wsql_programming_error, "the number of codecs does not match the number of fields.");
+        goto on_error;
+    }
+
+    if (!(plan = PyMem_New(int, self->num_fields + 1)))
+    {
+        PyErr_NoMemory();
+        goto on_error;
+    }
+
+    for (i = 0; i < self->num_fields; ++i)
+    {
+        item = PyTuple_GET_ITEM(decoders, i);
+        if (item == Py_None)
+        {
+            plan[i] = WSQL_CODEC_BYTES;
+        }
+        else if (PyLong_Check(item))
+        {
+            codec = PyLong_AsLong(item);
+            if (codec < WSQL_CODEC_BYTES || codec >= WSQL_CODEC_MAX)
+            {
+                PyErr_Format(wsql_programming_error, "unknown codec: %ld.", codec);
+                goto on_error;
+            }
+            plan[i] = (int)codec;
+        }
+        else if (PyCallable_Check(item))
+        {
+            plan[i] = WSQL_CODEC_CALL;
+        }
+        else
+        {
+            PyErr_SetString(PyExc_TypeError, "codec should be integer, callable or None.");
+            goto on_error;
+        }
+    }
+
+    PyMem_Free(self->codecs);
+    self->codecs = plan;
+    Py_XDECREF(self->decoders);
+    self->decoders = decoders;
+    Py_RETURN_NONE;
+
+  on_error:
+    PyMem_Free(plan);
+    Py_XDECREF(decoders);
+    return NULL;
+}
+
+static void wsql_result_free_result(wsql_result *self)
+{
+    MYSQL_RES *result = self->result;
+    self->result = NULL;
+
     if (!self->use)
     {
-        row = mysql_fetch_row(self->result);
+        mysql_free_result(result);
     }
     else
     {
+        /* the unread rows of unbuffered result are read from network */
         Py_BEGIN_ALLOW_THREADS;
-        row = mysql_fetch_row(self->result);
+        mysql_free_result(result);
         Py_END_ALLOW_THREADS;
     }
-    return wsql_result_convert_row(self, row);
 }
 
 static int wsql_result_clear(wsql_result *self)
@@ -221,14 +651,26 @@ static int wsql_result_clear(wsql_result *self)
     TRACE1("%p", self);
 
     if (self->result)
-    {
-        mysql_free_result(self->result);
-        self->result = NULL;
-    }
+        wsql_result_free_result(self);
 
     Py_XDECREF(self->fields);
     self->fields = NULL;
 
+    Py_XDECREF(self->description);
+    self->description = NULL;
+
+    Py_XDECREF(self->names);
+    self->names = NULL;
+
+    Py_XDECREF(self->decoders);
+    self->decoders = NULL;
+
+    PyMem_Free(self->codecs);
+    self->codecs = NULL;
+
+    Py_XDECREF(self->columns);
+    self->columns = NULL;
+
     Py_XDECREF(self->connection);
     self->connection = NULL;
     return 0;
@@ -248,8 +690,7 @@ static PyObject* wsql_result_free(wsql_result *self)
         return NULL;
     }
 
-    mysql_free_result(self->result);
-    self->result = NULL;
+    wsql_result_free_result(self);
     Py_RETURN_NONE;
 }
 
@@ -396,6 +837,114 @@ static PyObject* wsql_result_fetch_row_async(wsql_result *self)
     return NULL;
 }
 
+static const char wsql_result_fetch_rows_async__doc__[] =
+  "fetch_rows_async(size=-1) -- Fetch up to size rows in a non-blocking manner.\n"
+  "Returns a tuple of (status, rows). The rows are fetched until the descriptor\n"
+  "would block or size rows are fetched. If status is NET_ASYNC_NOT_READY,\n"
+  "no rows are available and the descriptor should be waited on for more rows.\n"
+  "Otherwise, status is NET_ASYNC_COMPLETE, and the empty list of rows\n"
+  "indicates the end of the result set.\n";
+
+static PyObject* wsql_result_fetch_rows_async(wsql_result *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"size", NULL};
+    PyObject *rows = NULL, *row = NULL, *result;
+    MYSQL_ROW mysql_row;
+    net_async_status status = NET_ASYNC_COMPLETE;
+    Py_ssize_t size = -1;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|n:fetch_rows_async", kwlist, &size))
+        return NULL;
+
+    CHECK_RESULT(self, NULL);
+
+    if (!(rows = PyList_New(0)))
+        return NULL;
+
+    while (self->more_rows && (size < 0 || PyList_GET_SIZE(rows) < size))
+    {
+        status = mysql_fetch_row_nonblocking(self->result, &mysql_row);
+        if (status == NET_ASYNC_NOT_READY)
+            break;
+
+        if (!(row = wsql_result_convert_row(self, mysql_row)))
+            goto on_error;
+
+        if (row == Py_None)
+        {
+            Py_DECREF(row);
+            break;
+        }
+
+        if (PyList_Append(rows, row) < 0)
+            goto on_error;
+
+        Py_CLEAR(row);
+    }
+
+    /* the already fetched rows are returned without waiting for descriptor */
+    if (PyList_GET_SIZE(rows) > 0)
+        status = NET_ASYNC_COMPLETE;
+
+    result = Py_BuildValue("(iO)", status, rows);
+    Py_DECREF(rows);
+    return result;
+
+  on_error:
+    Py_XDECREF(row);
+    Py_DECREF(rows);
+    return NULL;
+}
+
+static const char wsql_result_fetch_columns_async__doc__[] =
+  "Fetch all remaining rows as a tuple of columns in a non-blocking manner.\n"
+  "Returns a tuple of (status, columns). If status is NET_ASYNC_NOT_READY,\n"
+  "columns is None and the descriptor should be waited on for more rows.\n"
+  "Otherwise, status is NET_ASYNC_COMPLETE, and columns are complete.\n";
+
+static PyObject* wsql_result_fetch_columns_async(wsql_result *self)
+{
+    PyObject *columns, *result;
+    MYSQL_ROW row;
+    net_async_status status;
+
+    CHECK_RESULT(self, NULL);
+
+    /* the partially fetched columns are kept between calls */
+    if (!self->columns && !(self->columns = wsql_result_new_columns(self)))
+        return NULL;
+
+    for (;;)
+    {
+        status = mysql_fetch_row_nonblocking(self->result, &row);
+        if (status == NET_ASYNC_NOT_READY)
+            return Py_BuildValue("(iO)", status, Py_None);
+
+        if (!row)
+        {
+            if (wsql_result_end_of_rows(self) < 0)
+                goto on_error;
+            break;
+        }
+
+        if (wsql_result_append_columns(self, self->columns, row) < 0)
+            goto on_error;
+    }
+
+    columns = wsql_result_finish_columns(self, self->columns);
+    Py_CLEAR(self->columns);
+    if (!columns)
+        return NULL;
+
+    result = Py_BuildValue("(iO)", status, columns);
+    Py_DECREF(columns);
+    return result;
+
+  on_error:
+    Py_CLEAR(self->columns);
+    return NULL;
+}
+
 static const char wsql_result_free_async__doc__[] =
 "free internal structures, should be called after all results are fetched(async version).";
 
@@ -457,6 +1006,24 @@ static PyMethodDef wsql_result_methods[] = {
         METH_NOARGS,
         wsql_result_fetch_row__doc__
     },
+    {
+        "fetch_rows",
+        (PyCFunction)wsql_result_fetch_rows,
+        METH_VARARGS | METH_KEYWORDS,
+        wsql_result_fetch_rows__doc__
+    },
+    {
+        "fetch_columns",
+        (PyCFunction)wsql_result_fetch_columns,
+        METH_VARARGS | METH_KEYWORDS,
+        wsql_result_fetch_columns__doc__
+    },
+    {
+        "set_codecs",
+        (PyCFunction)wsql_result_set_codecs,
+        METH_VARARGS,
+        wsql_result_set_codecs__doc__
+    },
     {
         "free",
         (PyCFunction)wsql_result_free,
@@ -471,6 +1038,18 @@ static PyMethodDef wsql_result_methods[] = {
         METH_NOARGS,
         wsql_result_fetch_row_async__doc__
     },
+    {
+        "fetch_rows_async",
+        (PyCFunction)wsql_result_fetch_rows_async,
+        METH_VARARGS | METH_KEYWORDS,
+        wsql_result_fetch_rows_async__doc__
+    },
+    {
+        "fetch_columns_async",
+        (PyCFunction)wsql_result_fetch_columns_async,
+        METH_NOARGS,
+        wsql_result_fetch_columns_async__doc__
+    },
     {
         "free_async",
         (PyCFunction)wsql_result_free_async,
@@ -535,6 +1114,13 @@ static struct PyGetSetDef wsql_result_getset[]  = {
         (char*)wsql_result_description__doc__,
         NULL
     },
+    {
+        "names",
+        (getter)wsql_result_get_names,
+        NULL,
+        (char*)wsql_result_names__doc__,
+        NULL
+    },
     {NULL} /* Sentinel */
 };
 
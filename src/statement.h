@@ -0,0 +1,54 @@
+/*
+WSQL
+====
+An asynchronous python interface to MySQL
+---------------------------------------------------------
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+*/
+
+#ifndef __WSQL_STATEMENT_H__
+#define __WSQL_STATEMENT_H__
+
+#include "connection.h"
+
+#define STATEMENT_CONNECTION(s) ((wsql_connection *)s->connection)
+#define CHECK_STATEMENT(s, res) CHECK_CONNECTION(STATEMENT_CONNECTION(s), res); \
+    if (!s->stmt) { PyErr_SetString(wsql_programming_error, "the statement has been closed already."); return res; }
+
+extern PyTypeObject wsql_statement_t;
+
+struct wsql_statement_column_t;
+union wsql_statement_value_t;
+
+typedef struct {
+    PyObject_HEAD
+    PyObject *connection;
+    MYSQL_STMT *stmt;
+    unsigned long num_params;
+    unsigned int num_fields;
+    int more_rows;
+    PyObject *names;
+    PyObject *description;
+    MYSQL_BIND *results;
+    struct wsql_statement_column_t *columns;
+    MYSQL_BIND *params;
+    union wsql_statement_value_t *values;
+    PyObject *keep;
+} wsql_statement;
+
+/* creates and prepares the statement */
+extern PyObject* wsql_statement_new(wsql_connection *connection, const char *query, Py_ssize_t length);
+
+#endif //__WSQL_STATEMENT_H__
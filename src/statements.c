@@ -0,0 +1,952 @@
+/*
+WSQL
+====
+An asynchronous python interface to MySQL
+---------------------------------------------------------
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+*/
+
+#include "statement.h"
+#include "codec.h"
+
+/* the initial size of buffer for string column, if the maximum length is not known */
+#define WSQL_STATEMENT_BUFFER_SIZE 256
+
+/* the storage of parameter or column of the binary protocol */
+typedef union wsql_statement_value_t {
+    long long integer;
+    double real;
+    float single;
+    MYSQL_TIME time;
+} wsql_statement_value;
+
+struct wsql_statement_column_t {
+    wsql_statement_value value;
+    char *buffer;
+    unsigned long capacity;
+    unsigned long length;
+    my_bool is_null;
+    my_bool error;
+    int codec;
+};
+
+static const char wsql_statement__doc__[] =
+"Statement -- the server-side prepared statement.\n" \
+"Use connection.prepare(query) to create the instance.\n" \
+"The parameters are sent and the rows are received by the binary protocol,\n" \
+"the numbers, dates and times are decoded without the intermediate strings.\n";
+
+/* the codec of column, that is received as string */
+static int wsql_statement_string_codec(wsql_statement *self, MYSQL_FIELD *field)
+{
+    if (field->type == MYSQL_TYPE_DECIMAL || field->type == MYSQL_TYPE_NEWDECIMAL)
+        return WSQL_CODEC_DECIMAL;
+    if (field->charsetnr == 63)
+        return WSQL_CODEC_BYTES;
+    if (strncmp(mysql_character_set_name(&(STATEMENT_CONNECTION(self)->connection)), "utf8", 4) == 0)
+        return WSQL_CODEC_STRING;
+    /* the other charsets are decoded by python codec */
+    return WSQL_CODEC_CALL;
+}
+
+static void wsql_statement_free_columns(wsql_statement *self)
+{
+    unsigned int i;
+
+    if (self->columns)
+    {
+        for (i = 0; i < self->num_fields; ++i)
+            PyMem_Free(self->columns[i].buffer);
+    }
+    PyMem_Free(self->columns);
+    self->columns = NULL;
+    PyMem_Free(self->results);
+    self->results = NULL;
+    self->num_fields = 0;
+}
+
+/* binds the columns of result, the string columns are bound to buffers with max_length */
+static int wsql_statement_bind_results(wsql_statement *self, MYSQL_RES *metadata)
+{
+    MYSQL_FIELD *fields = mysql_fetch_fields(metadata);
+    struct wsql_statement_column_t *column;
+    MYSQL_BIND *bind;
+    unsigned int i, n = mysql_num_fields(metadata);
+
+    if (!(self->results = PyMem_Malloc(n * sizeof(MYSQL_BIND))) ||
+        !(self->columns = PyMem_Malloc(n * sizeof(struct wsql_statement_column_t))))
+    {
+        PyErr_NoMemory();
+        return -1;
+    }
+
+    memset(self->results, 0, n * sizeof(MYSQL_BIND));
+    memset(self->columns, 0, n * sizeof(struct wsql_statement_column_t));
+    self->num_fields = n;
+
+    for (i = 0; i < n; ++i)
+    {
+        bind = self->results + i;
+        column = self->columns + i;
+        bind->is_null = &(column->is_null);
+        bind->error = &(column->error);
+        bind->length = &(column->length);
+        bind->is_unsigned = (fields[i].flags & UNSIGNED_FLAG) ? 1 : 0;
+
+        switch (fields[i].type)
+        {
+        case MYSQL_TYPE_TINY:
+        case MYSQL_TYPE_SHORT:
+        case MYSQL_TYPE_INT24:
+        case MYSQL_TYPE_LONG:
+        case MYSQL_TYPE_LONGLONG:
+        case MYSQL_TYPE_YEAR:
+            bind->buffer_type = MYSQL_TYPE_LONGLONG;
+            bind->buffer = &(column->value.integer);
+            break;
+        case MYSQL_TYPE_FLOAT:
+            bind->buffer_type = MYSQL_TYPE_FLOAT;
+            bind->buffer = &(column->value.single);
+            break;
+        case MYSQL_TYPE_DOUBLE:
+            bind->buffer_type = MYSQL_TYPE_DOUBLE;
+            bind->buffer = &(column->value.real);
+            break;
+        case MYSQL_TYPE_DATE:
+        case MYSQL_TYPE_NEWDATE:
+        case MYSQL_TYPE_TIME:
+        case MYSQL_TYPE_DATETIME:
+        case MYSQL_TYPE_TIMESTAMP:
+            bind->buffer_type = fields[i].type;
+            bind->buffer = &(column->value.time);
+            break;
+        default:
+            column->codec = wsql_statement_string_codec(self, fields + i);
+            column->capacity = fields[i].max_length;
+            if (!column->capacity)
+                column->capacity = fields[i].length < WSQL_STATEMENT_BUFFER_SIZE ? fields[i].length : WSQL_STATEMENT_BUFFER_SIZE;
+            if (!column->capacity)
+                column->capacity = 1;
+            if (!(column->buffer = PyMem_Malloc(column->capacity)))
+            {
+                PyErr_NoMemory();
+                return -1;
+            }
+            bind->buffer_type = MYSQL_TYPE_STRING;
+            bind->buffer = column->buffer;
+            bind->buffer_length = column->capacity;
+            break;
+        }
+    }
+
+    if (mysql_stmt_bind_result(self->stmt, self->results))
+    {
+        wsql_raise_stmt_error(STATEMENT_CONNECTION(self), self->stmt);
+        return -1;
+    }
+    return 0;
+}
+
+static PyObject* wsql_statement_decode_value(wsql_statement *self, unsigned int i)
+{
+    struct wsql_statement_column_t *column = self->columns + i;
+    MYSQL_BIND *bind = self->results + i;
+    char buffer[32];
+
+    if (column->is_null)
+        Py_RETURN_NONE;
+
+    switch (bind->buffer_type)
+    {
+    case MYSQL_TYPE_LONGLONG:
+        if (bind->is_unsigned)
+            return PyLong_FromUnsignedLongLong((unsigned long long)column->value.integer);
+        return PyLong_FromLongLong(column->value.integer);
+    case MYSQL_TYPE_FLOAT:
+        /* the same precision as the text protocol */
+        snprintf(buffer, sizeof(buffer), "%.6g", column->value.single);
+        return PyFloat_FromDouble(PyOS_string_to_double(buffer, NULL, NULL));
+    case MYSQL_TYPE_DOUBLE:
+        return PyFloat_FromDouble(column->value.real);
+    case MYSQL_TYPE_STRING:
+        break;
+    default:
+        return wsql_decode_time_struct(&(column->value.time), bind->buffer_type);
+    }
+
+    if (column->length > column->capacity)
+    {
+        /* the column was truncated, fetch the whole value */
+        PyMem_Free(column->buffer);
+        column->capacity = column->length;
+        if (!(column->buffer = PyMem_Malloc(column->capacity)))
+            return PyErr_NoMemory();
+        bind->buffer = column->buffer;
+        bind->buffer_length = column->capacity;
+        /* the library keeps the copy of binds, so the grown buffer should be bound again */
+        if (mysql_stmt_fetch_column(self->stmt, bind, i, 0) || mysql_stmt_bind_result(self->stmt, self->results))
+            return wsql_raise_stmt_error(STATEMENT_CONNECTION(self), self->stmt);
+    }
+
+    if (column->codec == WSQL_CODEC_CALL)
+    {
+        return PyUnicode_Decode(column->buffer, column->length,
+                                mysql_character_set_name(&(STATEMENT_CONNECTION(self)->connection)), NULL);
+    }
+    return wsql_decode_value(column->codec, column->buffer, column->length);
+}
+
+/* converts the fetched row by the result code of fetch, returns Py_None if there is no more rows */
+static PyObject* wsql_statement_convert_row(wsql_statement *self, int error)
+{
+    PyObject *v, *result = NULL;
+    unsigned int i, n = self->num_fields;
+
+    if (error == MYSQL_NO_DATA)
+    {
+        self->more_rows = 0;
+        Py_RETURN_NONE;
+    }
+    if (error && error != MYSQL_DATA_TRUNCATED)
+        return wsql_raise_stmt_error(STATEMENT_CONNECTION(self), self->stmt);
+
+    if (!(result = PyTuple_New(n)))
+        return NULL;
+
+    for (i = 0; i < n; ++i)
+    {
+        if (!(v = wsql_statement_decode_value(self, i)))
+            goto on_error;
+        PyTuple_SET_ITEM(result, i, v);
+    }
+
+    return result;
+
+  on_error:
+    Py_DECREF(result);
+    return NULL;
+}
+
+/* fetches the next row, returns Py_None if there is no more rows */
+static PyObject* wsql_statement_next_row(wsql_statement *self)
+{
+    if (!self->more_rows)
+        Py_RETURN_NONE;
+
+    return wsql_statement_convert_row(self, mysql_stmt_fetch(self->stmt));
+}
+
+/* returns the python encoding of the connection charset */
+static const char* wsql_statement_encoding(wsql_statement *self)
+{
+    const char *charset = mysql_character_set_name(&(STATEMENT_CONNECTION(self)->connection));
+
+    /* utf8, utf8mb3 and utf8mb4 are unknown to python */
+    if (strncmp(charset, "utf8", 4) == 0)
+        return "utf-8";
+    return charset;
+}
+
+/* binds parameter value, the objects, that own the data, are appended to keep */
+static int wsql_statement_bind_param(MYSQL_BIND *bind, wsql_statement_value *storage, PyObject *value, PyObject *keep, const char *encoding)
+{
+    PyObject *text = NULL;
+    char *data;
+    Py_ssize_t length;
+    int overflow;
+    enum enum_field_types type;
+
+    if (value == Py_None)
+    {
+        bind->buffer_type = MYSQL_TYPE_NULL;
+        return 0;
+    }
+
+    if (PyBool_Check(value) || PyLong_Check(value))
+    {
+        storage->integer = PyLong_AsLongLongAndOverflow(value, &overflow);
+        if (overflow < 0)
+        {
+            PyErr_SetString(PyExc_OverflowError, "int too small to convert to BIGINT");
+            return -1;
+        }
+        if (overflow > 0)
+        {
+            storage->integer = (long long)PyLong_AsUnsignedLongLong(value);
+            bind->is_unsigned = 1;
+        }
+        if (PyErr_Occurred())
+            return -1;
+        bind->buffer_type = MYSQL_TYPE_LONGLONG;
+        bind->buffer = &(storage->integer);
+        return 0;
+    }
+
+    if (PyFloat_Check(value))
+    {
+        storage->real = PyFloat_AS_DOUBLE(value);
+        bind->buffer_type = MYSQL_TYPE_DOUBLE;
+        bind->buffer = &(storage->real);
+        return 0;
+    }
+
+    if (wsql_encode_time(value, &(storage->time), &type))
+    {
+        bind->buffer_type = type;
+        bind->buffer = &(storage->time);
+        return 0;
+    }
+
+    if (PyBytes_Check(value))
+    {
+        text = value;
+        Py_INCREF(text);
+    }
+    else if (PyUnicode_Check(value))
+    {
+        if (!(text = PyUnicode_AsEncodedString(value, encoding, NULL)))
+            return -1;
+    }
+    else
+    {
+        /* the decimals and other objects are sent as the string representation */
+        PyObject *str = PyObject_Str(value);
+        if (!str)
+            return -1;
+        text = PyUnicode_AsEncodedString(str, encoding, NULL);
+        Py_DECREF(str);
+        if (!text)
+            return -1;
+    }
+
+    if (PyList_Append(keep, text) < 0)
+    {
+        Py_DECREF(text);
+        return -1;
+    }
+    Py_DECREF(text);
+
+    if (PyBytes_AsStringAndSize(text, &data, &length) < 0)
+        return -1;
+
+    bind->buffer_type = MYSQL_TYPE_STRING;
+    bind->buffer = data;
+    bind->buffer_length = (unsigned long)length;
+    return 0;
+}
+
+static void wsql_statement_free_params(wsql_statement *self)
+{
+    PyMem_Free(self->params);
+    self->params = NULL;
+    PyMem_Free(self->values);
+    self->values = NULL;
+    Py_XDECREF(self->keep);
+    self->keep = NULL;
+}
+
+/* binds the parameters of execution, the binds are alive until wsql_statement_free_params */
+static int wsql_statement_bind_params(wsql_statement *self, PyObject *args)
+{
+    PyObject *params;
+    const char *encoding;
+    unsigned long i, n = self->num_params;
+
+    if (!(params = args ? PySequence_Fast(args, "args should be a sequence") : PyTuple_New(0)))
+        return -1;
+
+    if ((unsigned long)PySequence_Fast_GET_SIZE(params) != n)
+    {
+        PyErr_Format(wsql_programming_error, "the statement requires %lu parameters, %zd given",
+                     n, PySequence_Fast_GET_SIZE(params));
+        goto on_error;
+    }
+
+    if (n)
+    {
+        if (!(self->keep = PyList_New(0)))
+            goto on_error;
+
+        self->params = PyMem_Malloc(n * sizeof(MYSQL_BIND));
+        self->values = PyMem_Malloc(n * sizeof(wsql_statement_value));
+        if (!self->params || !self->values)
+        {
+            PyErr_NoMemory();
+            goto on_error;
+        }
+        memset(self->params, 0, n * sizeof(MYSQL_BIND));
+
+        encoding = wsql_statement_encoding(self);
+        for (i = 0; i < n; ++i)
+        {
+            if (wsql_statement_bind_param(self->params + i, self->values + i, PySequence_Fast_GET_ITEM(params, i), self->keep, encoding) < 0)
+                goto on_error;
+        }
+
+        if (mysql_stmt_bind_param(self->stmt, self->params))
+        {
+            wsql_raise_stmt_error(STATEMENT_CONNECTION(self), self->stmt);
+            goto on_error;
+        }
+    }
+
+    Py_DECREF(params);
+    return 0;
+
+  on_error:
+    wsql_statement_free_params(self);
+    Py_DECREF(params);
+    return -1;
+}
+
+/* binds the columns of result after execution, if there is result */
+static int wsql_statement_bind_metadata(wsql_statement *self)
+{
+    MYSQL_RES *metadata;
+    int error;
+
+    if (!(metadata = mysql_stmt_result_metadata(self->stmt)))
+        return 0;
+
+    error = wsql_statement_bind_results(self, metadata);
+    if (!error)
+        self->more_rows = 1;
+
+    mysql_free_result(metadata);
+    return error;
+}
+
+PyObject* wsql_statement_new(wsql_connection *connection, const char *query, Py_ssize_t length)
+{
+    wsql_statement *self;
+    int error;
+
+    CHECK_CONNECTION(connection, NULL);
+
+    if (!(self = Py_ALLOC(wsql_statement, wsql_statement_t)))
+        return NULL;
+
+    self->connection = (PyObject*)connection;
+    Py_INCREF(self->connection);
+    self->num_fields = 0;
+    self->num_params = 0;
+    self->more_rows = 0;
+    self->names = NULL;
+    self->description = NULL;
+    self->results = NULL;
+    self->columns = NULL;
+    self->params = NULL;
+    self->values = NULL;
+    self->keep = NULL;
+
+    if (!(self->stmt = mysql_stmt_init(&(connection->connection))))
+    {
+        wsql_raise_error(connection);
+        goto on_error;
+    }
+
+    Py_BEGIN_ALLOW_THREADS
+    error = mysql_stmt_prepare(self->stmt, query, (unsigned long)length);
+    Py_END_ALLOW_THREADS
+
+    if (error)
+    {
+        wsql_raise_stmt_error(connection, self->stmt);
+        goto on_error;
+    }
+
+    self->num_params = mysql_stmt_param_count(self->stmt);
+    return (PyObject*)self;
+
+  on_error:
+    Py_DECREF(self);
+    return NULL;
+}
+
+static int wsql_statement_reset(wsql_statement *self)
+{
+    int error = 0;
+
+    Py_XDECREF(self->names);
+    self->names = NULL;
+    Py_XDECREF(self->description);
+    self->description = NULL;
+
+    if (self->results)
+    {
+        self->more_rows = 0;
+        Py_BEGIN_ALLOW_THREADS
+        error = mysql_stmt_free_result(self->stmt);
+        Py_END_ALLOW_THREADS
+    }
+    wsql_statement_free_columns(self);
+    return error;
+}
+
+static const char wsql_statement_execute__doc__[] =
+"execute(args=()) -- Executes the statement with parameters.\n" \
+"  The parameters are bound by type: None, int, float, bytes, str,\n" \
+"  date, datetime, time and timedelta are sent natively,\n" \
+"  other objects are sent as the string representation.\n" \
+"  The rows of result are stored on the client side.\n";
+
+static PyObject* wsql_statement_execute(wsql_statement *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"args", NULL};
+    PyObject *params = NULL;
+    my_bool update_max_length = 1;
+    int error;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|O:execute", kwlist, &params))
+        return NULL;
+
+    CHECK_STATEMENT(self, NULL);
+
+    if (wsql_statement_reset(self))
+        return wsql_raise_stmt_error(STATEMENT_CONNECTION(self), self->stmt);
+
+    if (wsql_statement_bind_params(self, params) < 0)
+        return NULL;
+
+    mysql_stmt_attr_set(self->stmt, STMT_ATTR_UPDATE_MAX_LENGTH, &update_max_length);
+
+    Py_BEGIN_ALLOW_THREADS
+    error = mysql_stmt_execute(self->stmt);
+    if (!error && mysql_stmt_field_count(self->stmt))
+        error = mysql_stmt_store_result(self->stmt);
+    Py_END_ALLOW_THREADS
+
+    wsql_statement_free_params(self);
+
+    if (error)
+        return wsql_raise_stmt_error(STATEMENT_CONNECTION(self), self->stmt);
+
+    if (wsql_statement_bind_metadata(self) < 0)
+        return NULL;
+
+    Py_RETURN_NONE;
+}
+
+static const char wsql_statement_fetch_row__doc__[] =
+"  Fetches one row of the last execution as a tuple.\n" \
+"  NULL is returned as None.\n" \
+"  A single None indicates the end of the result set.\n";
+
+static PyObject* wsql_statement_fetch_row(wsql_statement *self)
+{
+    CHECK_STATEMENT(self, NULL);
+    return wsql_statement_next_row(self);
+}
+
+static const char wsql_statement_fetch_rows__doc__[] =
+"fetch_rows(size=-1) -- Fetches up to size rows as a list of tuples.\n" \
+"  If size is negative, all remaining rows are fetched.\n" \
+"  An empty list indicates the end of the result set.\n";
+
+static PyObject* wsql_statement_fetch_rows(wsql_statement *self, PyObject *args, PyObject *kwargs)
+{
+    static char *kwlist[] = {"size", NULL};
+    PyObject *rows = NULL, *row = NULL;
+    Py_ssize_t size = -1, i;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "|n:fetch_rows", kwlist, &size))
+        return NULL;
+
+    CHECK_STATEMENT(self, NULL);
+
+    if (!(rows = PyList_New(0)))
+        return NULL;
+
+    for (i = 0; size < 0 || i < size; ++i)
+    {
+        if (!(row = wsql_statement_next_row(self)))
+            goto on_error;
+
+        if (row == Py_None)
+        {
+            Py_DECREF(row);
+            break;
+        }
+
+        if (PyList_Append(rows, row) < 0)
+            goto on_error;
+
+        Py_DECREF(row);
+    }
+    return rows;
+
+  on_error:
+    Py_XDECREF(row);
+    Py_DECREF(rows);
+    return NULL;
+}
+
+static const char wsql_statement_free__doc__[] =
+"free() -- Frees the result of the last execution, the statement stays prepared.\n";
+
+static PyObject* wsql_statement_free(wsql_statement *self)
+{
+    CHECK_STATEMENT(self, NULL);
+
+    if (wsql_statement_reset(self))
+        return wsql_raise_stmt_error(STATEMENT_CONNECTION(self), self->stmt);
+
+    Py_RETURN_NONE;
+}
+
+static int wsql_statement_clear(wsql_statement *self)
+{
+    TRACE1("%p", self);
+
+    Py_XDECREF(self->names);
+    self->names = NULL;
+
+    Py_XDECREF(self->description);
+    self->description = NULL;
+
+    wsql_statement_free_columns(self);
+    wsql_statement_free_params(self);
+
+    if (self->stmt)
+    {
+        Py_BEGIN_ALLOW_THREADS
+        mysql_stmt_close(self->stmt);
+        Py_END_ALLOW_THREADS
+        self->stmt = NULL;
+    }
+
+    Py_XDECREF(self->connection);
+    self->connection = NULL;
+    return 0;
+}
+
+static const char wsql_statement_close__doc__[] =
+"close() -- Deallocates the statement on the server.\n";
+
+static PyObject* wsql_statement_close(wsql_statement *self)
+{
+    if (self->stmt)
+    {
+        CHECK_CONNECTION(STATEMENT_CONNECTION(self), NULL);
+        wsql_statement_clear(self);
+    }
+    Py_RETURN_NONE;
+}
+
+static char wsql_statement_names__doc__[] =
+"the tuple of column names of the last execution, the names are interned strings.\n";
+
+static PyObject* wsql_statement_get_names(wsql_statement *self, void* closure)
+{
+    PyObject *result, *name;
+    MYSQL_RES *metadata;
+    MYSQL_FIELD *fields;
+    unsigned int i, n;
+
+    CHECK_STATEMENT(self, NULL);
+
+    if (self->names)
+    {
+        Py_INCREF(self->names);
+        return self->names;
+    }
+
+    if (!(metadata = mysql_stmt_result_metadata(self->stmt)))
+        return PyTuple_New(0);
+
+    n = mysql_num_fields(metadata);
+    fields = mysql_fetch_fields(metadata);
+
+    if (!(result = PyTuple_New(n)))
+        goto on_error;
+
+    for (i=0; i<n; ++i) {
+        if (!(name = PyUnicode_InternFromString(fields[i].name)))
+            goto on_error;
+        PyTuple_SET_ITEM(result, i, name);
+    }
+
+    mysql_free_result(metadata);
+    Py_INCREF(result);
+    self->names = result;
+    return result;
+
+  on_error:
+    mysql_free_result(metadata);
+    Py_XDECREF(result);
+    return NULL;
+}
+
+static char wsql_statement_description__doc__[] =
+"the sequence of 7-tuples required by the DB-API for\n" \
+"the Cursor.description attribute.\n";
+
+static PyObject* wsql_statement_get_description(wsql_statement *self, void* closure)
+{
+    PyObject *result = NULL, *field_desc;
+    MYSQL_RES *metadata;
+    MYSQL_FIELD *fields;
+    unsigned int i, n;
+
+    CHECK_STATEMENT(self, NULL);
+
+    if (self->description)
+    {
+        Py_INCREF(self->description);
+        return self->description;
+    }
+
+    if (!(metadata = mysql_stmt_result_metadata(self->stmt)))
+        Py_RETURN_NONE;
+
+    n = mysql_num_fields(metadata);
+    fields = mysql_fetch_fields(metadata);
+
+    if (!(result = PyTuple_New(n)))
+        goto on_error;
+
+    for (i=0; i<n; ++i) {
+        field_desc = Py_BuildValue("(siiiiii)",
+                                   fields[i].name,
+                                   (long) fields[i].type,
+                                   (long) fields[i].max_length,
+                                   (long) fields[i].length,
+                                   (long) fields[i].length,
+                                   (long) fields[i].decimals,
+                                   (long) !(IS_NOT_NULL(fields[i].flags)));
+        if (!field_desc)
+            goto on_error;
+
+        PyTuple_SET_ITEM(result, i, field_desc);
+    }
+
+    mysql_free_result(metadata);
+    Py_INCREF(result);
+    self->description = result;
+    return result;
+
+  on_error:
+    mysql_free_result(metadata);
+    Py_XDECREF(result);
+    return NULL;
+}
+
+static char wsql_statement_affected_rows__doc__[] =
+"the number of rows changed by the last execution.\n";
+
+static PyObject* wsql_statement_get_affected_rows(wsql_statement *self, void* closure)
+{
+    my_ulonglong count;
+    CHECK_STATEMENT(self, NULL);
+    count = mysql_stmt_affected_rows(self->stmt);
+    if (count == (my_ulonglong)-1)
+        return PyLong_FromLong(-1);
+    return PyLong_FromUnsignedLongLong(count);
+}
+
+static char wsql_statement_insert_id__doc__[] =
+"the ID generated for an AUTO_INCREMENT column by the last execution.\n";
+
+static PyObject* wsql_statement_get_insert_id(wsql_statement *self, void* closure)
+{
+    CHECK_STATEMENT(self, NULL);
+    return PyLong_FromUnsignedLongLong(mysql_stmt_insert_id(self->stmt));
+}
+
+static char wsql_statement_num_rows__doc__[] =
+"the number of rows in the result of the last execution.\n";
+
+static PyObject* wsql_statement_get_num_rows(wsql_statement *self, void* closure)
+{
+    CHECK_STATEMENT(self, NULL);
+    return PyLong_FromUnsignedLongLong(mysql_stmt_num_rows(self->stmt));
+}
+
+static char wsql_statement_use__doc__[] =
+"Always False, the rows of statement are stored on the client side,\n" \
+"like the rows of result of connection.get_result(use=False).\n";
+
+static PyObject* wsql_statement_get_use(wsql_statement *self, void* closure)
+{
+    Py_RETURN_FALSE;
+}
+
+static void wsql_statement_dealloc(wsql_statement *self)
+{
+    TRACE1("%p", self);
+    wsql_statement_clear(self);
+    Py_FREE(self);
+}
+
+static PyObject* wsql_statement_repr(wsql_statement *self)
+{
+    char buf[300];
+    sprintf(buf, "<" STRINGIFY(MODULE_NAME) ".Statement object at %p>", self);
+    return PyString_FromString(buf);
+}
+
+static PyMethodDef wsql_statement_methods[] = {
+    {
+        "execute",
+        (PyCFunction)wsql_statement_execute,
+        METH_VARARGS | METH_KEYWORDS,
+        wsql_statement_execute__doc__
+    },
+    {
+        "fetch_row",
+        (PyCFunction)wsql_statement_fetch_row,
+        METH_NOARGS,
+        wsql_statement_fetch_row__doc__
+    },
+    {
+        "fetch_rows",
+        (PyCFunction)wsql_statement_fetch_rows,
+        METH_VARARGS | METH_KEYWORDS,
+        wsql_statement_fetch_rows__doc__
+    },
+    {
+        "free",
+        (PyCFunction)wsql_statement_free,
+        METH_NOARGS,
+        wsql_statement_free__doc__
+    },
+    {
+        "close",
+        (PyCFunction)wsql_statement_close,
+        METH_NOARGS,
+        wsql_statement_close__doc__
+    },
+    {NULL,              NULL} /* sentinel */
+};
+
+static struct PyMemberDef wsql_statement_members[] = {
+    {
+        "connection",
+        T_OBJECT,
+        offsetof(wsql_statement, connection),
+        READONLY,
+        "Connection associated with statement"
+    },
+    {
+        "num_params",
+        T_ULONG,
+        offsetof(wsql_statement, num_params),
+        READONLY,
+        "The number of parameters in the statement."
+    },
+    {
+        "num_fields",
+        T_UINT,
+        offsetof(wsql_statement, num_fields),
+        READONLY,
+        "The number of fields (column) in the result of the last execution."
+    },
+    {
+        "more_rows",
+        T_INT,
+        offsetof(wsql_statement, more_rows),
+        READONLY,
+        "True if there is more rows, otherwise False"
+    },
+    {NULL} /* Sentinel */
+};
+
+static struct PyGetSetDef wsql_statement_getset[]  = {
+    {
+        "use",
+        (getter)wsql_statement_get_use,
+        NULL,
+        (char*)wsql_statement_use__doc__,
+        NULL
+    },
+    {
+        "names",
+        (getter)wsql_statement_get_names,
+        NULL,
+        (char*)wsql_statement_names__doc__,
+        NULL
+    },
+    {
+        "description",
+        (getter)wsql_statement_get_description,
+        NULL,
+        (char*)wsql_statement_description__doc__,
+        NULL
+    },
+    {
+        "affected_rows",
+        (getter)wsql_statement_get_affected_rows,
+        NULL,
+        (char*)wsql_statement_affected_rows__doc__,
+        NULL
+    },
+    {
+        "insert_id",
+        (getter)wsql_statement_get_insert_id,
+        NULL,
+        (char*)wsql_statement_insert_id__doc__,
+        NULL
+    },
+    {
+        "num_rows",
+        (getter)wsql_statement_get_num_rows,
+        NULL,
+        (char*)wsql_statement_num_rows__doc__,
+        NULL
+    },
+    {NULL} /* Sentinel */
+};
+
+PyTypeObject wsql_statement_t = {
+    PyVarObject_HEAD_INIT(NULL, 0)
+    STRINGIFY(MODULE_NAME) ".Statement",  /* tp_name */
+    sizeof(wsql_statement),               /* tp_basicsize */
+    0,                                    /* tp_itemsize */
+    (destructor)wsql_statement_dealloc,   /* tp_dealloc */
+    0,                                    /* tp_print */
+    0,                                    /* tp_getattr */
+    0,                                    /* tp_setattr */
+    0,                                    /* tp_reserved */
+    (reprfunc)wsql_statement_repr,        /* tp_repr */
+    0,                                    /* tp_as_number */
+    0,                                    /* tp_as_sequence */
+    0,                                    /* tp_as_mapping */
+    0,                                    /* tp_hash  */
+    0,                                    /* tp_call */
+    0,                                    /* tp_str */
+    0,                                    /* tp_getattro */
+    0,                                    /* tp_setattro */
+    0,                                    /* tp_as_buffer */
+    Py_TPFLAGS_DEFAULT,                   /* tp_flags */
+    wsql_statement__doc__,                /* tp_doc */
+    0,                                    /* tp_traverse */
+    (inquiry)wsql_statement_clear,        /* tp_clear */
+    0,                                    /* tp_richcompare */
+    0,                                    /* tp_weaklistoffset */
+    0,                                    /* tp_iter */
+    0,                                    /* tp_iternext */
+    wsql_statement_methods,               /* tp_methods */
+    wsql_statement_members,               /* tp_members */
+    wsql_statement_getset,                /* tp_getset */
+    0,                                    /* tp_base */
+    0,                                    /* tp_dict */
+    0,                                    /* tp_descr_get */
+    0,                                    /* tp_descr_set */
+    0,                                    /* tp_dictoffset */
+    0,                                    /* tp_init */
+    PyType_GenericAlloc,                  /* tp_alloc */
+    (newfunc)_PyObject_NewVar,            /* tp_new */
+    PyObject_Del                          /* tp_del */
+};
@@ -135,7 +135,9 @@ class ConfigurationAsync(ConfigurationBase):
 
     @staticmethod
     def decorator(func):
-        return asyncio.coroutine(func)
+        async def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+        return wrapper
 
     @staticmethod
     def iscoroutine(func):
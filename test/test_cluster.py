@@ -47,6 +47,12 @@ class TestServerInfo(TestCase):
         srv_info = ServerInfo(socket_name='/var/tmp/socket.sock')
         self.assertEqual('/var/tmp/socket.sock', str(srv_info))
 
+    def test_connection_factory(self):
+        """test the connection arguments of server are prepared once"""
+        srv_info = ServerInfo(host='localhost', port=3306, client_flag=1)
+        self.assertEqual('localhost', srv_info.connect.kwargs['host'])
+        self.assertEqual(1, srv_info.connect.kwargs['client_flag'] & 1)
+
 
 class TestCluster(DatabaseTestCase):
     def make_upstream(self, servers):
@@ -318,14 +324,67 @@ class TestClusterAsync(TestCluster):
     def get_context(cls):
         return _wsql_context.Context(_wsql_context.ConfigurationAsync())
 
+    def test_connection_pool_checkout(self):
+        """test async with on checkout of connection from pool"""
+        pool = self.make_pool(self.make_upstream([{"count": 1}]), 0.1)
+
+        async def checkout():
+            async with pool.checkout() as connection:
+                self.assertEqual(0, pool._reserve)
+                return connection
+
+        self.assertIsNotNone(self._context.wait(checkout()))
+        self.assertEqual(1, pool._queue.qsize())
+
+    def test_connection_pool_reset(self):
+        """test the session of idle connection is reset before use"""
+        pool = ConnectionPool(self.make_upstream([{"count": 1}]), timeout=0.1, loop=self._context.loop, reset=True)
+
+        async def checkout():
+            async with pool.checkout() as connection:
+                await connection.query("SET @wsql_test=1")
+            async with pool.checkout() as connection:
+                cursor = connection.cursor()
+                try:
+                    await connection.ping()
+                    await cursor.execute("SELECT @wsql_test, @@autocommit")
+                    return await cursor.fetchall()
+                finally:
+                    await cursor.close()
+
+        try:
+            self.assertEqual([(None, 0)], self._context.wait(checkout()))
+        except exceptions.NotSupportedError:  # pragma: no cover
+            self.skipTest("the client library does not support non-blocking reset of connection")
+
+    def test_connection_pool_reset_error(self):
+        """test the failed reset of session does not ban the server"""
+        pool = ConnectionPool(self.make_upstream([{"count": 1}]), timeout=0.1, loop=self._context.loop, reset=True)
+
+        async def reset_connection():
+            exc = exceptions.OperationalError(self._context.constants.ER_UNKNOWN_ERROR, "reset failed")
+            exc.code = self._context.constants.ER_UNKNOWN_ERROR
+            raise exc
+
+        async def checkout():
+            async with pool.checkout() as connection:
+                connection.reset_connection = reset_connection
+            async with pool.checkout() as connection2:
+                return connection, connection2
+
+        connection, connection2 = self._context.wait(checkout())
+        self.assertIsNot(connection, connection2)
+        self.assertFalse(connection.connected)
+        self.assertEqual(0, connection.meta.penalty)
+        self.assertEqual(1, pool._queue.qsize())
+
     def get_insert_query(self, table, error=None):
-        @self._context.decorator
-        def query(connection):
+        async def query(connection):
             cursor = connection.cursor()
             try:
-                yield from cursor.execute('INSERT INTO %s VALUES (\'%s\')' % (table, 'Evelina'))
+                await cursor.execute('INSERT INTO %s VALUES (\'%s\')' % (table, 'Evelina'))
             finally:
-                yield from cursor.close()
+                await cursor.close()
 
             if error:
                 raise error
@@ -339,10 +398,9 @@ class TestClusterAsync(TestCluster):
         :param query: the query to wrap
         :return: wrapped query
         """
-        @self._context.decorator
-        def wrapper(connection):
+        async def wrapper(connection):
             if self._context.iscoroutine(query):  # pragma: no cover
-                return (yield from query(connection))
+                return await query(connection)
             return query(connection)
         return wrapper
 
@@ -26,8 +26,12 @@ except ImportError:  # pragma: no cover
     from . import _wsql_context
 
 from wsql import converters
+from wsql._cache import LRUCache
 import wsql
 import _wsql
+import array
+import asyncio
+import datetime
 import warnings
 import types
 
@@ -46,6 +50,19 @@ class TestDBAPISet(TestCase):
         self.assertNotEqual(_wsql.constants.FIELD_TYPE_DATE, wsql.STRING)
 
 
+class TestLRUCache(TestCase):
+    def test_lru(self):
+        cache = LRUCache(2)
+        cache.put(1, 'a')
+        cache.put(2, 'b')
+        self.assertEqual('a', cache.get(1))
+        cache.put(3, 'c')
+        self.assertIsNone(cache.get(2))
+        self.assertEqual('a', cache.get(1))
+        self.assertEqual('c', cache.get(3))
+        self.assertEqual(2, len(cache))
+
+
 class TestConverters(TestCase):
     def test_tuple_row_decoder(self):
         """test format row as tuple"""
@@ -97,6 +114,21 @@ class TestConverters(TestCase):
                                None, (lambda x, y: None,))
         self.assertEqual("a", converters.get_codec(None, None, (lambda x, y: "a",)))
 
+    def test_encoders_cache(self):
+        """test the encoders are resolved once per type"""
+        calls = []
+
+        def custom_encoder(_, value):
+            calls.append(value)
+            return converters.int_to_sql
+
+        encoders = [custom_encoder]
+        self.assertEqual((1, 2), converters.encode_args(None, (1, 2), encoders))
+        self.assertEqual([1], calls)
+        converters.invalidate_encoders_cache()
+        self.assertEqual((3,), converters.encode_args(None, (3,), encoders))
+        self.assertEqual([1, 3], calls)
+
 
 class TestCoreModule(TestCase):
     """Core c-module features."""
@@ -115,6 +147,32 @@ class TestCoreModule(TestCase):
     def test_client_info(self):
         self.assertIsInstance(_wsql.get_client_info(), str)
 
+    def test_compile(self):
+        """Compiled template should format like format."""
+        template = _wsql.compile(b"SELECT %s, 100%% FROM %s")
+        self.assertEqual(2, template.num_args)
+        for args in ((1, b"a"), (b"'x'", 2.5)):
+            self.assertEqual(_wsql.format(template.query, args), template.render(args))
+        self.assertRaises(TypeError, template.render, (1,))
+        self.assertRaises(TypeError, template.render, (1, 2, 3))
+        self.assertRaises(ValueError, _wsql.compile, b"%q")
+
+    def test_render_many(self):
+        """Compiled template should render multiple rows into single query."""
+        template = _wsql.compile(b"(%s,%s)")
+        rows = [(1, b"'a'"), (2, b"'b'")]
+        self.assertEqual(b"VALUES (1,'a'),\n(2,'b');", template.render_many(rows, b"VALUES ", b";", b",\n"))
+        self.assertEqual(b"(1,'a'),(2,'b')", template.render_many(iter(rows)))
+        self.assertRaises(TypeError, template.render_many, [(1,)])
+
+    def test_render_many_max_size(self):
+        """Compiled template should stop rendering before row, that does not fit into max_size."""
+        template = _wsql.compile(b"(%s)")
+        rows = iter([(1,), (2,), (3,)])
+        self.assertEqual((b"V(1),(2);", (3,)), template.render_many(rows, b"V", b";", b",", 9))
+        self.assertEqual((None, None), template.render_many(rows, b"V", b";", b",", 9))
+        self.assertEqual((b"V(3);", None), template.render_many([(3,)], b"V", b";", b",", 1))
+
     def test_thread_safe(self):
         self.assertIsInstance(_wsql.thread_safe(), int)
 
@@ -133,6 +191,12 @@ class CoreAPI(DatabaseTestCase):
         connection = self._context.connection()
         self.assertIsInstance(connection.charset, str, "Should return a string.")
 
+    def test_session_setup(self):
+        """test the charset and autocommit are set up on connect"""
+        connection = self._context.connection()
+        self.assertTrue(connection.charset.startswith('utf8'))
+        self.assertFalse(connection.autocommit)
+
     def test_host_info(self):
         connection = self._context.connection()
         self.assertIsInstance(connection.host_info, str, "Should return a string.")
@@ -197,6 +261,90 @@ class TestCursorBase(DatabaseTestCase):
         finally:
             cursor.close()
 
+    def test_decoders_cache(self):
+        """test the decoders of the same result shape are resolved once"""
+        connection = self._context.connection()
+        cursor = self._context.wrap(connection.cursor())
+        try:
+            connection.decoders_cache.clear()
+            cursor.execute("SELECT 1 AS a, 'a' AS b")
+            cursor.execute("SELECT 2 AS a, 'b' AS b")
+            self.assertEqual([(2, 'b')], cursor.fetchall())
+            self.assertEqual(1, len(connection.decoders_cache))
+        finally:
+            cursor.close()
+
+    def test_executemany_split_by_packet(self):
+        """test executemany splits rows into queries by max_allowed_packet"""
+        table = self._create_table(('a INT',), None)
+        connection = self._context.connection()
+        cursor = self._context.wrap(connection.cursor())
+        try:
+            connection._max_allowed_packet = 100
+            cursor.executemany('INSERT INTO %s VALUES (%%s)' % table, [(i,) for i in range(20)])
+            self.assertEqual(20, cursor.rowcount)
+            cursor.execute('SELECT COUNT(*) FROM %s' % table)
+            self.assertEqual([(20,)], cursor.fetchall())
+        finally:
+            connection._max_allowed_packet = None
+            cursor.close()
+
+    def test_executemany_after_unread_result(self):
+        """test executemany releases the unread result before query"""
+        table = self._create_table(('a INT',), None)
+        connection = self._context.connection()
+        cursor = self._context.wrap(connection.cursor())
+        try:
+            self.assertIsNotNone(connection._max_allowed_packet)
+            cursor.execute("SELECT 1 UNION ALL SELECT 2")
+            connection._max_allowed_packet = None
+            cursor.executemany('INSERT INTO %s VALUES (%%s)' % table, [(i,) for i in range(3)])
+            self.assertEqual(3, cursor.rowcount)
+        finally:
+            cursor.close()
+
+    def test_executemany_statements(self):
+        """test executemany packs non-insert statements into multi-statement queries"""
+        table = self._create_table(('a INT', 'b INT'), lambda i, j: i)
+        connection = self._context.connection()
+        cursor = self._context.wrap(connection.cursor())
+        try:
+            connection._max_allowed_packet = 100
+            cursor.executemany('UPDATE %s SET b = %%s WHERE a = %%s;' % table, [(i * 2, i) for i in range(1, 5)])
+            self.assertEqual(4, cursor.rowcount)
+            cursor.execute('SELECT a, b FROM %s WHERE b = a * 2 ORDER BY a' % table)
+            self.assertEqual([(i, i * 2) for i in range(5)], cursor.fetchall())
+        finally:
+            connection._max_allowed_packet = None
+            cursor.close()
+
+    def test_fetch_by_batches(self):
+        """test fetchmany and fetchall by batches"""
+        cursor = self._context.wrap(self._context.connection().cursor())
+        try:
+            cursor.execute("SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3")
+            self.assertEqual([(1,), (2,)], cursor.fetchmany(2))
+            self.assertEqual([(3,)], cursor.fetchall())
+            self.assertEqual([], cursor.fetchall())
+        finally:
+            cursor.close()
+
+    def test_fetch_columns(self):
+        """test fetch result as columns"""
+        cursor = self._context.wrap(self._context.connection().cursor())
+        try:
+            cursor.execute("SELECT 1, 0.5E0, NULL, 'a' UNION ALL SELECT 2, 1.5E0, NULL, 'b'")
+            columns = cursor.fetch_columns()
+            self.assertEqual(4, len(columns))
+            self.assertIsInstance(columns[0], array.array)
+            self.assertIsInstance(columns[1], array.array)
+            self.assertEqual([1, 2], list(columns[0]))
+            self.assertEqual([0.5, 1.5], list(columns[1]))
+            self.assertEqual([None, None], columns[2])
+            self.assertEqual(['a', 'b'], columns[3])
+        finally:
+            cursor.close()
+
 
 class TestCursor(TestCursorBase):
     @classmethod
@@ -208,10 +356,220 @@ class TestCursor(TestCursorBase):
         with self._context.connection().cursor() as cursor:
             cursor.execute('select 1;')
 
+    def test_execute_prepared(self):
+        """test execute of server-side prepared statement"""
+        connection = self._context.connection()
+        cursor = connection.cursor()
+        query = "SELECT ?, ?, ?, CAST(? AS DATE)"
+        try:
+            cursor.execute_prepared(query, (1, 'a', None, datetime.date(2015, 1, 2)))
+            self.assertEqual(4, len(cursor.description))
+            self.assertEqual([(1, 'a', None, datetime.date(2015, 1, 2))], cursor.fetchall())
+            self.assertIs(connection.prepare(query), connection.prepare(query.encode()))
+            self.assertRaises(wsql.ProgrammingError, cursor.execute_prepared, "SELECT ?", ())
+            self.assertRaises(OverflowError, cursor.execute_prepared, "SELECT ?", (-2 ** 64,))
+        finally:
+            cursor.close()
+
+    def test_execute_prepared_charset(self):
+        """test the string parameters of prepared statement are encoded by charset of connection"""
+        kwargs = dict(self._context.connect_kwargs, charset='cp1251')
+        connection = wsql.connect(**kwargs)
+        cursor = connection.cursor()
+        try:
+            cursor.execute_prepared("SELECT HEX(?)", ('\u044f',))
+            self.assertEqual([('FF',)], cursor.fetchall())
+        finally:
+            cursor.close()
+            connection.close()
+
+    def test_execute_prepared_shared(self):
+        """test that the cached prepared statement is not shared between cursors"""
+        connection = self._context.connection()
+        cursor1 = connection.cursor()
+        cursor2 = connection.cursor()
+        query = "SELECT ?"
+        try:
+            cursor1.execute_prepared(query, (1,))
+            cursor2.execute_prepared(query, (2,))
+            self.assertEqual([(2,)], cursor2.fetchall())
+            self.assertEqual([(1,)], cursor1.fetchall())
+            self.assertRaises(wsql.NotSupportedError, cursor1.fetch_columns)
+        finally:
+            cursor1.close()
+            cursor2.close()
+
+    def test_fetch_rows(self):
+        """test fetch rows from result by batches"""
+        connection = self._context.connection()
+        connection.query(b"SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3")
+        result = connection.get_result()
+        try:
+            self.assertEqual([(b'1',), (b'2',)], result.fetch_rows(2))
+            self.assertEqual([(b'3',)], result.fetch_rows())
+            self.assertEqual([], result.fetch_rows())
+        finally:
+            result.free()
+
+    def test_names(self):
+        """test cached column names and description of result"""
+        connection = self._context.connection()
+        connection.query(b"SELECT 1 AS a, 2 AS b")
+        result = connection.get_result()
+        try:
+            self.assertEqual(('a', 'b'), result.names)
+            self.assertIs(result.names, result.names)
+            self.assertIs(result.description, result.description)
+        finally:
+            result.free()
+
+    def test_set_codecs(self):
+        """test native decoding of result by codecs plan"""
+        connection = self._context.connection()
+        connection.query(b"SELECT 1, 1.5, NULL, 'a'")
+        result = connection.get_result()
+        try:
+            self.assertRaises(wsql.ProgrammingError, result.set_codecs, (_wsql.constants.CODEC_INT,))
+            result.set_codecs((_wsql.constants.CODEC_INT, _wsql.constants.CODEC_FLOAT, _wsql.constants.CODEC_INT, lambda x: x.upper()))
+            self.assertEqual([(1, 1.5, None, b'A')], result.fetch_rows())
+        finally:
+            result.free()
+
 
 class TestCursorAsync(TestCursorBase):
     @classmethod
     def get_context(cls):
         return _wsql_context.Context(_wsql_context.ConfigurationAsync())
 
+    def test_async_protocols(self):
+        """test async with and async for on cursor"""
+        connection = self._context.connection()
+
+        async def query():
+            async with connection.cursor() as cursor:
+                await cursor.execute("SELECT 1 UNION ALL SELECT 2")
+                return [row async for row in cursor]
+
+        self.assertEqual([(1,), (2,)], self._context.wait(query()))
+
+    def test_dispatch_connection(self):
+        """test the connection driven by one long-lived callback"""
+        connection = self._context.wait(wsql.connect(loop=self._context.loop, dispatch=True, **self._context.connect_kwargs))
+        try:
+            self.assertIsInstance(connection, wsql.connections.AsyncDispatchConnection)
+            cursor = self._context.wrap(connection.cursor())
+            try:
+                cursor.execute("SELECT 1 UNION ALL SELECT 2")
+                self.assertEqual([(1,), (2,)], cursor.fetchall())
+            finally:
+                cursor.close()
+        finally:
+            connection.close()
+
+    def test_pipeline(self):
+        """test the queries of pipeline are sent at once and resolved in order"""
+        connection = self._context.connection()
+        pipeline = connection.pipeline()
+        first = pipeline.execute("SELECT 1")
+        second = pipeline.execute("SELECT %s", (2,))
+        third = pipeline.execute("DO 1")
+        self._context.wait(pipeline.run())
+        self.assertEqual([(1,)], first.result())
+        self.assertEqual([(2,)], second.result())
+        self.assertEqual(0, third.result())
+
+        failed = pipeline.execute("SELECT * FROM %s" % self.unique_name('table'))
+        skipped = pipeline.execute("SELECT 1")
+        self._context.wait(pipeline.run())
+        self.assertIsInstance(failed.exception(), wsql.ProgrammingError)
+        self.assertTrue(skipped.cancelled())
+
+    def test_pipeline_cancel(self):
+        """test the futures of pipeline are cancelled, if run is cancelled"""
+        connection = self._context.wait(wsql.connect(loop=self._context.loop, **self._context.connect_kwargs))
+        pipeline = connection.pipeline()
+        first = pipeline.execute("SELECT SLEEP(10)")
+        second = pipeline.execute("SELECT 1")
+        with self.assertRaises(asyncio.TimeoutError):
+            self._context.wait(asyncio.wait_for(pipeline.run(), 0.1))
+        self._context.wait(asyncio.sleep(0))
+        self.assertTrue(first.cancelled())
+        self.assertTrue(second.cancelled())
+        self.assertTrue(connection.closed)
+
+    def test_store_result(self):
+        """test the async cursor stores the whole result if use_result is False"""
+        connection = self._context.wait(wsql.connect(loop=self._context.loop, use_result=False, **self._context.connect_kwargs))
+
+        async def query():
+            async with connection.cursor() as cursor:
+                await cursor.execute("SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3")
+                self.assertEqual(3, cursor.rowcount)
+                self.assertEqual((1,), await cursor.fetchone())
+                return await cursor.fetchall()
+
+        try:
+            self.assertEqual([(2,), (3,)], self._context.wait(query()))
+        finally:
+            connection.close()
+
+    def test_wait_for(self):
+        """test the query is killed on server, if deadline expires"""
+        connection = self._context.wait(wsql.connect(loop=self._context.loop, **self._context.connect_kwargs))
+
+        async def query():
+            async with connection.cursor() as cursor:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await connection.wait_for(cursor.execute("SELECT SLEEP(10)"), 0.1, 5)
+                self.assertFalse(connection.interrupted)
+                await cursor.execute("SELECT 1")
+                return await cursor.fetchall()
+
+        try:
+            self.assertEqual([(1,)], self._context.wait(query()))
+        finally:
+            connection.close()
+
+    def test_interrupt(self):
+        """test the connection is closed, if the pending operation is cancelled"""
+        connection = self._context.wait(wsql.connect(loop=self._context.loop, **self._context.connect_kwargs))
+        cursor = connection.cursor()
+        with self.assertRaises(asyncio.TimeoutError):
+            self._context.wait(asyncio.wait_for(cursor.execute("SELECT SLEEP(10)"), 0.1))
+        self._context.wait(asyncio.sleep(0))
+        self.assertTrue(connection.interrupted)
+        self.assertTrue(connection.closed)
+
+    def test_close_pending(self):
+        """test the pending operation is cancelled and the callback is removed on close"""
+        connection = self._context.wait(wsql.connect(loop=self._context.loop, **self._context.connect_kwargs))
+        future = connection.query("SELECT SLEEP(10)")
+        self.assertFalse(future.done())
+        connection.close()
+        self.assertTrue(future.cancelled())
+        self.assertIsNone(connection._registered)
+        self._context.wait(asyncio.sleep(0))
+        self.assertTrue(connection.closed)
+
+    def test_lazy_warnings(self):
+        """test the warnings are read only on demand if lazy_warnings is set"""
+        connection = self._context.wait(wsql.connect(loop=self._context.loop, lazy_warnings=True, **self._context.connect_kwargs))
+
+        async def query():
+            async with connection.cursor() as cursor:
+                await cursor.execute('drop table if exists %s' % self.unique_name('table'))
+                self.assertEqual([], cursor.messages)
+                with warnings.catch_warnings(record=True):
+                    fetched = await cursor.fetch_warnings()
+                self.assertEqual(fetched, cursor.messages)
+                self.assertEqual([], await cursor.fetch_warnings())
+                return fetched
+
+        try:
+            fetched = self._context.wait(query())
+        finally:
+            connection.close()
+        self.assertEqual(1, len(fetched))
+        self.assertIn('Unknown table', str(fetched[0]))
+
 del TestCursorBase
@@ -25,7 +25,7 @@ from ._types import *
 
 
 __all__ = [
-    'connect', 'apilevel', 'threadsafety', 'paramstyle',
+    'connect', 'ConnectionFactory', 'apilevel', 'threadsafety', 'paramstyle',
     'Warning', 'Error', 'InterfaceError', 'DatabaseError', 'DataError', 'OperationalError',
     'IntegrityError', 'InternalError', 'ProgrammingError', 'NotSupportedError', 'StandardError',
     'Date', 'Time', 'Timestamp', 'DateFromTicks', 'TimeFromTicks', 'TimestampFromTicks',
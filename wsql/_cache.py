@@ -0,0 +1,60 @@
+"""
+WSQL
+====
+An asynchronous DB API v2.0 compatible interface to MySQL
+---------------------------------------------------------
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from collections import OrderedDict
+
+__all__ = ["LRUCache"]
+
+
+class LRUCache(OrderedDict):
+    """
+        The dictionary, that keeps only the maxsize recently used items.
+    """
+    def __init__(self, maxsize):
+        """
+        :param maxsize: the maximum number of items
+        """
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get(self, key, default=None):
+        """
+        :param key: the key
+        :param default: the value, that will be returned if there is no such key
+        :return: the value associated with key and mark it as recently used
+        """
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        self.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        add value to cache and remove the least recently used item if cache is full
+        :param key: the key
+        :param value: the value
+        :return: the value
+        """
+        self[key] = value
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+        return value
@@ -17,9 +17,15 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from asyncio import iscoroutine, iscoroutinefunction, coroutine
+from asyncio import iscoroutine, iscoroutinefunction
 import _wsql
 
+try:
+    from inspect import markcoroutinefunction
+except ImportError:  # pragma: no cover
+    # python < 3.12
+    markcoroutinefunction = None
+
 __all__ = ["transaction", "retryable"]
 
 
@@ -45,7 +51,7 @@ def transaction(query):
     :param query: the query
     """
 
-    if iscoroutinefunction(query) or iscoroutine(query):
+    if isinstance(query, _AsyncTransactionScope) or iscoroutinefunction(query) or iscoroutine(query):
         return _AsyncTransactionScope(query)
     return _TransactionScope(query)
 
@@ -72,21 +78,22 @@ class _AsyncTransactionScope(TransactionScope):
 
     def __init__(self, query):
         self._query = query
-        self._is_coroutine = True  # For iscoroutinefunction().
+        if markcoroutinefunction is not None:
+            # for iscoroutinefunction()
+            markcoroutinefunction(self)
 
-    @coroutine
-    def __call__(self, connection):
+    async def __call__(self, connection):
         if _is_transaction_scope(connection):
-            return (yield from self._query(connection))
+            return await self._query(connection)
 
         try:
             _begin_transaction(connection)
-            r = yield from self._query(connection)
-            yield from connection.commit()
+            r = await self._query(connection)
+            await connection.commit()
             return r
         except:
             if connection.connected:
-                yield from connection.rollback()
+                await connection.rollback()
             raise
         finally:
             _close_transaction(connection)
@@ -130,16 +137,15 @@ class AsyncRetryable:
         """execute query in current connection"""
         return self._execute(query, self._count - 1)
 
-    @coroutine
-    def _execute(self, query, retry_number):
+    async def _execute(self, query, retry_number):
         """internal method to execute query with retry-count check"""
         try:
-            return (yield from self._connection.execute(query))
+            return await self._connection.execute(query)
         except Exception as e:
             if retry_number <= 0 or not _wsql.exceptions.is_retryable(e):
                 raise
-        yield from self._sleep(self._delay, loop=self._loop)
-        return (yield from self._execute(query, retry_number - 1))
+        await self._sleep(self._delay)
+        return await self._execute(query, retry_number - 1)
 
 
 class _Retryable:
@@ -17,8 +17,10 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from asyncio import coroutine, wait_for
+from asyncio import wait_for
+from wsql.exceptions import Error, NotSupportedError
 from wsql.connections import UNSET
+import _wsql
 
 
 __all__ = ["ConnectionPool"]
@@ -71,7 +73,9 @@ class _ConnectionPoolBase:
             self._queue.put_nowait(connection)
         else:
             self._reserve += 1
-            self._upstream.invalidate(connection)
+            # the interrupted connection is closed by client, the server is still available
+            if not connection.interrupted:
+                self._upstream.invalidate(connection)
 
 
 class _AsyncConnectionPool(_ConnectionPoolBase):
@@ -80,50 +84,101 @@ class _AsyncConnectionPool(_ConnectionPoolBase):
         the connections will be created on demand
     """
 
-    def __init__(self, upstream, loop=None, timeout=None):
+    def __init__(self, upstream, loop=None, timeout=None, reset=False):
         """
         Initialize pool
         :param upstream: the upstream
         :param loop: the event loop, by default current event loop will be used
+        :param reset: if True, the session state of idle connection is reset before use,
+                      the broken connections are discarded
         """
         from asyncio.queues import Queue, QueueEmpty
         from asyncio import TimeoutError, get_event_loop
 
-        super().__init__(upstream, Queue(len(upstream), loop=loop), timeout=timeout)
+        super().__init__(upstream, Queue(len(upstream)), timeout=timeout)
         self._loop = loop or get_event_loop()
+        self._reset = reset
         self.QueueEmpty = QueueEmpty
         self.TimeoutError = TimeoutError
 
-    @coroutine
-    def _acquire(self):
+    async def _acquire(self):
         """
         acquire free connection from free connections queue or create a new one if possible
         :return: connection
         """
-        try:
-            return self._queue.get_nowait()
-        except self.QueueEmpty:
-            pass
-
-        if self._reserve == 0:
-            return (yield from wait_for(self._queue.get(), timeout=self._timeout, loop=self._loop))
-
-        self._reserve -= 1
-        return (yield from wait_for(next(self._upstream), timeout=self._timeout, loop=self._loop))
-
-    @coroutine
-    def execute(self, query):
+        while True:
+            try:
+                connection = self._queue.get_nowait()
+            except self.QueueEmpty:
+                if self._reserve > 0:
+                    self._reserve -= 1
+                    return await wait_for(next(self._upstream), timeout=self._timeout)
+                connection = await wait_for(self._queue.get(), timeout=self._timeout)
+
+            if not self._reset:
+                return connection
+            try:
+                await connection.reset_connection()
+                return connection
+            except NotSupportedError:
+                # the connection is intact
+                self._release(connection)
+                raise
+            except BaseException as e:
+                # the broken or interrupted connection is discarded, the slot is used to create a new one
+                if connection.connected:
+                    connection.close()
+                if isinstance(e, Error) and not _wsql.exceptions.is_connection_lost(e):
+                    # the server is still available, only the session cannot be reset
+                    self._reserve += 1
+                else:
+                    self._release(connection)
+                if not isinstance(e, Error):
+                    raise
+
+    async def execute(self, query):
         """
         execute the database query on connection pool
         :param query: - the callable object, that implement logic to query database
         :return the response to query
         """
-        connection = yield from self._acquire()
+        connection = await self._acquire()
         try:
-            return (yield from connection.execute(query))
+            return await connection.execute(query)
         finally:
             self._release(connection)
 
+    def checkout(self):
+        """
+        checkout connection from pool, use as: async with pool.checkout() as connection
+        :return the asynchronous context manager, that acquires connection on enter and releases it on exit
+        """
+        return _AsyncCheckout(self)
+
+
+class _AsyncCheckout:
+    """
+        The asynchronous context manager to checkout connection from pool
+    """
+
+    def __init__(self, pool):
+        """
+        :param pool: the asynchronous connection pool
+        """
+        self._pool = pool
+        self._connection = None
+
+    async def __aenter__(self):
+        """acquire connection"""
+        self._connection = await self._pool._acquire()
+        return self._connection
+
+    async def __aexit__(self, *_):
+        """release connection"""
+        connection, self._connection = self._connection, None
+        self._pool._release(connection)
+        return False
+
 
 class _ConnectionPool(_ConnectionPoolBase):
     """
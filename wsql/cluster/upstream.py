@@ -22,7 +22,6 @@ import logging
 import sys
 import wsql
 
-from asyncio import coroutine
 from time import monotonic
 from wsql.connections import UNSET
 
@@ -46,11 +45,13 @@ Upstream = upstream
 
 
 class ServerInfo:
-    def __init__(self, **kwargs):
+    def __init__(self, loop=UNSET, **kwargs):
         """
+        :param loop: the event-loop, if specified the asynchronous connections will be created
         :param kwargs: native connection arguments
         """
         self.kwargs = kwargs
+        self.connect = wsql.ConnectionFactory(loop=loop, **kwargs)
         self.penalty = 0
 
     def __str__(self):
@@ -110,11 +111,12 @@ class _UpstreamBase:
     Base class for connection providers
     """
 
-    def __init__(self, servers, logger, **kwargs):
+    def __init__(self, servers, logger, loop=UNSET, **kwargs):
         """
         Constructor
         :param servers: the list of servers
         :param logger: the logger object
+        :param loop: the event loop, if specified the asynchronous connections will be created
         :param kwargs: the connection arguments
         """
         def update_kwargs(host, port):
@@ -128,12 +130,12 @@ class _UpstreamBase:
         self._servers = []
         extend = self._servers.extend
         for s in servers:
-            extend([ServerInfo(**update_kwargs(s.get('host'), int(s.get('port', 0) or 0)))] * max(int(s.get('count', 1) or 1), 1))
+            extend([ServerInfo(loop, **update_kwargs(s.get('host'), int(s.get('port', 0) or 0)))] * max(int(s.get('count', 1) or 1), 1))
 
         if self._servers:
             random.shuffle(self._servers)
         else:
-            self._servers.append(ServerInfo(**kwargs))
+            self._servers.append(ServerInfo(loop, **kwargs))
 
         self._logger = logger or logging.getLogger(__package__)
         self.current = 0
@@ -176,14 +178,13 @@ class _AsyncUpstream(_UpstreamBase):
         :param logger: the logger object
         :param loop: the event loop
         """
-        super().__init__(servers, logger, **kwargs)
+        super().__init__(servers, logger, loop=loop, **kwargs)
         self._loop = loop
 
     def __next__(self):
         return self._next()
 
-    @coroutine
-    def _next(self):
+    async def _next(self):
         """
         Create a new connection to database, try one by one all servers.
         if there is no online servers the RuntimeError will be raised
@@ -196,7 +197,7 @@ class _AsyncUpstream(_UpstreamBase):
             info = self._servers[idx]
             if info.penalty <= time_:
                 try:
-                    return Connection((yield from wsql.connect(loop=self._loop, **info.kwargs)), info)
+                    return Connection(await info.connect(), info)
                 except wsql.Error as e:
                     # 1040 -- to many connections
                     # TODO need to properly handle this case
@@ -210,7 +211,7 @@ class _AsyncUpstream(_UpstreamBase):
         blacklist.sort(key=lambda x: x.penalty)
         for info in blacklist:
             try:
-                return Connection((yield from wsql.connect(loop=self._loop, **info.kwargs)), info)
+                return Connection(await info.connect(), info)
             except wsql.Error as e:
                 self.invalidate(info, e)
 
@@ -235,7 +236,7 @@ class _Upstream(_UpstreamBase):
             info = self._servers[idx]
             if info.penalty < time_:
                 try:
-                    return Connection(wsql.connect(**info.kwargs), info)
+                    return Connection(info.connect(), info)
                 except wsql.Error as e:
                     self.invalidate(info, e)
 
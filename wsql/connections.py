@@ -20,6 +20,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 __author = "@bg"
 
 from .converters import default_decoders, default_encoders, default_row_formatter
+from ._cache import LRUCache
 from .import exceptions
 import _wsql
 import asyncio
@@ -28,7 +29,24 @@ import weakref
 UNSET = object()
 
 
-__all__ = ['connect']
+__all__ = ['connect', 'ConnectionFactory']
+
+
+def _get_client_flag():
+    """
+    :return: the client capabilities, that are supported by client library
+    :rtype int
+    """
+    client_flag = 0
+    client_version = tuple((int(n) for n in _wsql.get_client_info().split('.')[:2]))
+    if client_version >= (4, 1):
+        client_flag |= _wsql.constants.CLIENT_MULTI_STATEMENTS
+    if client_version >= (5, 0):
+        client_flag |= _wsql.constants.CLIENT_MULTI_RESULTS
+    return client_flag
+
+# the client library cannot be changed in runtime, so capabilities are computed once
+_CLIENT_FLAG = _get_client_flag()
 
 
 def connect(*args, loop=UNSET, **kwargs):
@@ -54,7 +72,9 @@ def connect(*args, loop=UNSET, **kwargs):
     :type decoders: list|tuple
     :param encoders: SQL encoder stack
     :type encoders: list|tuple
-    :param row_formatter: the function to format row
+    :param row_formatter: the function to format row, it is called as row_formatter(decoders, names, row),
+                          the decoders may be converters.DECODED, if the row is decoded already,
+                          that is an iterator, so it should be zipped with row instead of indexed
     :param connect_timeout: number of seconds to wait before the connection attempt fails.
     :type connect_timeout: number
     :param compress: if set, compression is enabled
@@ -65,8 +85,8 @@ def connect(*args, loop=UNSET, **kwargs):
     :type read_default_file: str
     :param read_default_group: configuration group to use from the default file
     :type read_default_group: str
-    :param charset:     If supplied, the connection character set will be changed
-                        to this character set (MySQL-4.1 and newer). This implies use_unicode=True.
+    :param charset:     If supplied, the connection character set will be negotiated
+                        on handshake (MySQL-4.1 and newer). This implies use_unicode=True.
     :type charset: str
     :param sql_mode:    If supplied, the session SQL mode will be changed to this
                         setting (MySQL-4.1 and newer). For more details and legal
@@ -84,8 +104,14 @@ def connect(*args, loop=UNSET, **kwargs):
     :param loop: the event-loop, if specified the asynchronous connection will be created
     :param defer_warnings: if True, the warnings will be ignored
     :type defer_warnings: bool
+    :param lazy_warnings: if True, the asynchronous cursor does not read the warnings after query,
+                          they are read on demand by the cursor method fetch_warnings
+    :type lazy_warnings: bool
     :param use_result: store results on server or use buffered results
     :type   use_result: bool
+    :param dispatch: if True, the asynchronous connection is driven by one long-lived callback,
+                     see AsyncDispatchConnection
+    :type dispatch: bool
     :return: new coroutine in nonblocking mode and connection otherwise
     """
 
@@ -94,16 +120,48 @@ def connect(*args, loop=UNSET, **kwargs):
     return Connection(*args, **kwargs)
 
 
-@asyncio.coroutine
-def connection_promise(*args, sql_mode=None, charset=None, **kwargs):
+class ConnectionFactory:
+    """
+    Creates the connections with the same arguments.
+    The arguments are prepared once, so only the socket work is done per connect.
+    Non-standard.
+    """
+
+    def __init__(self, *args, loop=UNSET, client_flag=None, **kwargs):
+        """
+        :param args: connection args, for details see connect
+        :param loop: the event-loop, if specified the asynchronous connections will be created
+        :param client_flag: the flags of client, for details see connect
+        :param kwargs: connection keyword arguments, for details see connect
+        """
+        self.args = args
+        self.kwargs = kwargs
+        self.kwargs['client_flag'] = (client_flag or 0) | _CLIENT_FLAG
+        self.loop = loop
+
+    def __call__(self):
+        """
+        :return: new coroutine in nonblocking mode and connection otherwise
+        """
+        if self.loop is not UNSET:
+            return connection_promise(*self.args, loop=self.loop, **self.kwargs)
+        return Connection(*self.args, **self.kwargs)
+
+
+async def connection_promise(*args, sql_mode=None, dispatch=False, **kwargs):
     """
     Factory function for asynchronous connections.Connection.
     for details see connect
     """
 
-    connection = AsyncConnection(*args, **kwargs)
-    yield from connection.start()
-    connection.setup(charset, sql_mode)
+    connection = (AsyncDispatchConnection if dispatch else AsyncConnection)(*args, **kwargs)
+    await connection.start()
+    await connection.query(connection.setup(sql_mode))
+    await connection.next_result()
+    result = connection.get_result(True)
+    rows = await connection.call(result.fetch_rows_async)
+    await connection.call(result.free_async)
+    connection._max_allowed_packet = int(rows[0][0])
     return connection
 
 
@@ -124,11 +182,24 @@ class ConnectionBase(object):
 
     _db = None
 
+    # True if the connection was closed, because the pending operation was interrupted
+    interrupted = False
+
+    # the maximum number of cached decoders of results
+    decoders_cache_size = 128
+
+    # the maximum number of cached compiled query templates
+    templates_cache_size = 128
+
+    # the maximum number of cached prepared statements
+    statements_cache_size = 64
+
     def __init__(self, cursorclass, *args,
                  encoders=None,
                  decoders=None,
                  row_formatter=None,
                  defer_warnings=None,
+                 lazy_warnings=None,
                  use_result=None,
                  client_flag=None, **kwargs):
         """
@@ -139,6 +210,7 @@ class ConnectionBase(object):
         :param row_formatter: the function to format row
         :param client_flag: the flags of client, for details see connect
         :param defer_warnings: if True, the warnings will be ignored
+        :param lazy_warnings: if True, the warnings will be read on demand
         :param kwargs: connection keyword arguments, for details see connect
         """
 
@@ -148,38 +220,65 @@ class ConnectionBase(object):
         self.row_formatter = default_row_formatter if row_formatter is None else row_formatter
         self.format = _wsql.format
         self.defer_warnings = defer_warnings
+        self.lazy_warnings = lazy_warnings
         self.use_result = use_result
+        self.decoders_cache = LRUCache(self.decoders_cache_size)
+        self.templates_cache = LRUCache(self.templates_cache_size)
+        self.statements_cache = LRUCache(self.statements_cache_size)
+        # the statements, that hold the result of cursor
+        self._busy_statements = set()
 
-        client_flag = client_flag or 0
-        client_version = tuple((int(n) for n in _wsql.get_client_info().split('.')[:2]))
-        if client_version >= (4, 1):
-            client_flag |= _wsql.constants.CLIENT_MULTI_STATEMENTS
-        if client_version >= (5, 0):
-            client_flag |= _wsql.constants.CLIENT_MULTI_RESULTS
-
-        self._db = _wsql.connect(*args, client_flag=client_flag, **kwargs)
+        self._db = _wsql.connect(*args, client_flag=(client_flag or 0) | _CLIENT_FLAG, **kwargs)
         self.messages = []
         self._server_version = None
+        self._max_allowed_packet = None
+        self._session_variables = None
         weakref.finalize(self, lambda db: db.closed or db.close(), db=self._db)
 
-    def setup(self, charset, sql_mode):
+    def setup(self, sql_mode):
         """
-        :param charset:  If supplied, the connection character set will be changed
-                         to this character set (MySQL-4.1 and newer). This implies use_unicode=True.
-        :type charset: str
+        The charset is negotiated on handshake, so the rest of session initialization
+        is merged into one statement, that costs one round trip.
+        The max_allowed_packet is selected by the same query, the second result should be read
+        by the caller.
         :param sql_mode: If supplied, the session SQL mode will be changed to this
                          setting (MySQL-4.1 and newer). For more details and legal
                          values, see the MySQL documentation.
         :type sql_mode: str
-        :return: None
+        :return: the statement, that should be executed to initialize session
+        :rtype bytes
         """
-        if charset:
-            self._db.charset = charset
-        if sql_mode:
-            self._db.set_sql_mode(sql_mode)
-
         self._server_version = tuple(int(n) for n in self._db.server_info.split('.')[:2])
-        self._db.autocommit = False
+
+        variables = b"autocommit=0"
+        if sql_mode and self._server_version >= (4, 1):
+            variables += b", SESSION sql_mode='" + sql_mode.encode('ascii') + b"'"
+        self._session_variables = variables
+        return b"SET " + variables + b";SELECT @@max_allowed_packet"
+
+    def _reset_session(self):
+        """
+        forget the state of session, that is cleared by reset_connection
+        :return: the statement, that initializes the session again
+        :rtype bytes
+        """
+        # the prepared statements are deallocated by server
+        self.statements_cache = LRUCache(self.statements_cache_size)
+        self._busy_statements.clear()
+        return b"SET NAMES " + self._db.charset.encode('ascii') + b", " + self._session_variables
+
+    def template(self, query):
+        """
+        Non-standard.
+        :param query: the query with placeholders
+        :type query: bytes
+        :return: the compiled template of query, the templates are cached by query
+        """
+        cache = self.templates_cache
+        template = cache.get(query)
+        if template is None:
+            template = cache.put(query, _wsql.compile(query))
+        return template
 
     def __getattr__(self, item):
         """get attribute"""
@@ -200,10 +299,9 @@ class ConnectionBase(object):
 class Connection(ConnectionBase):
     """The Synchronous Connection Implementation"""
 
-    def __init__(self, *args, charset=None, sql_mode=None, **kwargs):
+    def __init__(self, *args, sql_mode=None, **kwargs):
         """
         :param args: connection args, for details see connect
-        :param charset: the connection charset
         :param sql_mode: the connection mode
         :param kwargs: connection keyword arguments, for details see connect
         """
@@ -211,7 +309,11 @@ class Connection(ConnectionBase):
         from .cursors import Cursor
         super().__init__(Cursor, *args, **kwargs)
 
-        self.setup(charset, sql_mode)
+        self._db.query(self.setup(sql_mode))
+        self._db.next_result()
+        result = self._db.get_result(False)
+        self._max_allowed_packet = int(result.fetch_row()[0])
+        result.free()
 
     def __enter__(self):
         """context object method"""
@@ -235,6 +337,47 @@ class Connection(ConnectionBase):
             query = query.encode(self._db.charset)
         return self._db.query(query)
 
+    def prepare(self, query):
+        """
+        Non-standard.
+        :param query: the query with '?' as the parameter placeholder
+        :type query: bytes|str
+        :return: the server-side prepared statement, the statements are cached by query,
+                 the statements evicted from cache are deallocated on server
+        """
+        if isinstance(query, str):
+            query = query.encode(self._db.charset)
+        cache = self.statements_cache
+        statement = cache.get(query)
+        if statement is None:
+            statement = cache.put(query, self._db.prepare(query))
+        return statement
+
+    def acquire_statement(self, query):
+        """
+        Non-standard. The statement holds only one result at a time,
+        so if the cached statement is in use by other cursor, a new statement is prepared,
+        that is not cached.
+        :param query: the query with '?' as the parameter placeholder
+        :type query: bytes|str
+        :return: the prepared statement, that should be returned by release_statement
+        """
+        if isinstance(query, str):
+            query = query.encode(self._db.charset)
+        statement = self.prepare(query)
+        if statement in self._busy_statements:
+            statement = self._db.prepare(query)
+        self._busy_statements.add(statement)
+        return statement
+
+    def release_statement(self, statement):
+        """
+        Non-standard. Mark the statement as not in use.
+        :param statement: the statement, that was returned by acquire_statement
+        :return: None
+        """
+        self._busy_statements.discard(statement)
+
     def show_warnings(self):
         """
         Non-standard. This is invoked automatically after executing a query,
@@ -251,6 +394,19 @@ class Connection(ConnectionBase):
         result = self._db.get_result(False)
         return tuple(result) if result else tuple()
 
+    def get_max_allowed_packet(self):
+        """
+        Non-standard. The value is read from server on connect.
+        :return the maximum size of packet, that can be sent to server
+        :rtype int
+        """
+        if self._max_allowed_packet is None:
+            self._db.query(b"SELECT @@max_allowed_packet")
+            result = self._db.get_result(False)
+            self._max_allowed_packet = int(result.fetch_row()[0])
+            result.free()
+        return self._max_allowed_packet
+
     def ping(self, reconnect=False):
         """
         check that connection to server is still alive
@@ -263,6 +419,19 @@ class Connection(ConnectionBase):
             raise self.ProgrammingError("autocommit must be enabled before enabling auto-reconnect; consider the consequences")
         return self._db.ping(reconnect)
 
+    def reset_connection(self):
+        """
+        Non-standard. Clear the session state without reconnecting,
+        the session is initialized again as after connect.
+        :return None
+        """
+        try:
+            reset_connection = self._db.reset_connection
+        except AttributeError:
+            raise self.NotSupportedError("the client library does not support reset of connection") from None
+        reset_connection()
+        self._db.query(self._reset_session())
+
 
 class AsyncConnection(ConnectionBase):
     """The asynchronous connection implementation"""
@@ -283,7 +452,23 @@ class AsyncConnection(ConnectionBase):
         from .cursors import AsyncCursor
         super().__init__(AsyncCursor, *args, nonblocking=True, **kwargs)
         self._loop = asyncio.get_event_loop() if loop is None else loop
-        self._server_version = None
+        # the arguments to open the side connection, that kills the running query
+        self._connect_args = (args, kwargs)
+        # the direction of registered callback, NET_ASYNC_READ, NET_ASYNC_WRITE or None
+        self._registered = None
+        # the Future of pending operation
+        self._future = None
+
+    async def __aenter__(self):
+        """asynchronous context manager"""
+        return self.cursor()
+
+    async def __aexit__(self, exc, *_):
+        """asynchronous context manager"""
+        if exc:
+            await self.rollback()
+        else:
+            await self.commit()
 
     def start(self):
         """
@@ -318,6 +503,100 @@ class AsyncConnection(ConnectionBase):
         """
         return self.promise(self._db.next_result_async)
 
+    def store_result(self):
+        """
+        read the whole result set into client buffer (internal)
+        :return promise, the stored result or None if query does not return rows
+        :rtype Future
+        """
+        return self.promise(self._db.store_result_async)
+
+    async def ping(self):
+        """
+        Non-standard. Check that connection to server is still alive in non-blocking manner.
+        The client library has no non-blocking ping, so the empty statement is sent instead,
+        the lost connection is not reconnected.
+        :return None
+        """
+        await self.query(b"DO 0")
+
+    async def reset_connection(self):
+        """
+        Non-standard. Clear the session state in non-blocking manner without reconnecting,
+        the session is initialized again as after connect.
+        :return None
+        """
+        try:
+            reset_connection_async = self._db.reset_connection_async
+        except AttributeError:
+            raise self.NotSupportedError("the client library does not support non-blocking reset of connection") from None
+        await self.call(reset_connection_async)
+        await self.query(self._reset_session())
+
+    async def kill_query(self):
+        """
+        Non-standard. Kill the query, that is executed by this connection.
+        The KILL QUERY is sent over a side connection,
+        the killed query completes with error, so the connection stays in a clean state.
+        :return: None
+        """
+        args, kwargs = self._connect_args
+        side = await connection_promise(*args, loop=self._loop, **kwargs)
+        try:
+            await side.query(b"KILL QUERY %d" % self._db.thread_id)
+        finally:
+            side.close()
+
+    async def wait_for(self, coro, timeout, drain_timeout=None):
+        """
+        Non-standard. Wait for the coroutine, that executes queries on this connection, with deadline.
+        If deadline expires, the running query is killed and the coroutine is awaited to drain the connection.
+        If the query cannot be killed or the connection is not drained in drain_timeout,
+        the coroutine is cancelled and the connection is closed.
+        :param coro: the coroutine, that uses this connection
+        :param timeout: the deadline in seconds
+        :param drain_timeout: the deadline in seconds to drain the connection after the query is killed,
+                              the timeout is used by default
+        :return: the result of coroutine
+        :raises asyncio.TimeoutError: if deadline expires
+        """
+        task = self._loop.create_task(coro)
+        try:
+            done, _ = await asyncio.wait((task,), timeout=timeout)
+            if done:
+                return task.result()
+
+            try:
+                await self.kill_query()
+            except self.Error:
+                task.cancel()
+
+            if drain_timeout is None:
+                drain_timeout = timeout
+            done, _ = await asyncio.wait((task,), timeout=drain_timeout)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+
+        if done:
+            try:
+                task.result()
+            except (self.Error, asyncio.CancelledError):
+                pass
+        else:
+            task.cancel()
+        raise asyncio.TimeoutError
+
+    def pipeline(self):
+        """
+        Non-standard.
+        :return: the pipeline, that sends the queued queries as one multi-statement query
+                 on exit from async with block
+        :rtype Pipeline
+        """
+        from .cursors import Pipeline
+        return Pipeline(self.cursor())
+
     def commit(self):
         """
         commit transaction
@@ -334,8 +613,7 @@ class AsyncConnection(ConnectionBase):
         """
         return self.query(b"ROLLBACK")
 
-    @asyncio.coroutine
-    def show_warnings(self):
+    async def show_warnings(self):
         """
         Non-standard. This is invoked automatically after executing a query,
         so you should not usually call it yourself.
@@ -348,16 +626,31 @@ class AsyncConnection(ConnectionBase):
         if self._server_version < (4, 1):
             return list()
 
-        yield from self.query(b"SHOW WARNINGS")
-        result = self.get_result(False)
+        await self.query(b"SHOW WARNINGS")
+        result = self.get_result(True)
         warnings = list()
-        while result is not None:
-            row = yield from self.promise(result.fetch_row_async)
-            if row is None:
-                break
-            warnings.append(row)
+        if result is not None:
+            rows = await self.call(result.fetch_rows_async)
+            while rows:
+                warnings.extend(rows)
+                rows = await self.call(result.fetch_rows_async)
+            await self.call(result.free_async)
         return warnings
 
+    async def get_max_allowed_packet(self):
+        """
+        Non-standard. The value is read from server on connect.
+        :return the maximum size of packet, that can be sent to server
+        :rtype int
+        """
+        if self._max_allowed_packet is None:
+            await self.query(b"SELECT @@max_allowed_packet")
+            result = self.get_result(True)
+            rows = await self.call(result.fetch_rows_async)
+            await self.call(result.free_async)
+            self._max_allowed_packet = int(rows[0][0])
+        return self._max_allowed_packet
+
     def add_read_callback(self, callback, *args):
         """
         register the read callback on self socket
@@ -390,59 +683,131 @@ class AsyncConnection(ConnectionBase):
         """
         self._loop.remove_writer(self._db.fd)
 
+    def get_direction(self):
+        """
+        :return: NET_ASYNC_READ or NET_ASYNC_WRITE, the socket event, that the current operation waits for
+        """
+        operation = self._db.async_operation
+        if operation == self.NET_ASYNC_READ:
+            return self.NET_ASYNC_READ
+        elif operation == self.NET_ASYNC_WRITE or operation == self.NET_ASYNC_CONNECT:
+            return self.NET_ASYNC_WRITE
+        raise RuntimeError("Unexpected async operation: %d" % operation)
+
     def remove_callback(self):
         """
         remove previously registered callback
         :return: None
         """
-        operation = self._db.async_operation
-        if operation == self.NET_ASYNC_READ:
+        registered = self._registered
+        self._registered = None
+        if registered == self.NET_ASYNC_READ:
             self.remove_read_callback()
-        elif operation == self.NET_ASYNC_WRITE or operation == self.NET_ASYNC_CONNECT:
+        elif registered == self.NET_ASYNC_WRITE:
             self.remove_write_callback()
-        else:
-            raise RuntimeError("Unexpected async operation: %d" % operation)
 
     def add_callback(self, callback, *args):
         """
-        register a new callback on socket
+        register a new callback on socket,
+        the callback of other direction is removed
         :param: callback: callable object
         :param args: arguments that will be passed to callback
         :return: None
         """
 
-        operation = self._db.async_operation
-        if operation == self.NET_ASYNC_READ:
+        direction = self.get_direction()
+        if self._registered is not None and self._registered != direction:
+            self.remove_callback()
+        if direction == self.NET_ASYNC_READ:
             self.add_read_callback(callback, *args)
-        elif operation == self.NET_ASYNC_WRITE or operation == self.NET_ASYNC_CONNECT:
-            self.add_write_callback(callback, *args)
         else:
-            raise RuntimeError("Unexpected async operation: %d" % operation)
+            self.add_write_callback(callback, *args)
+        self._registered = direction
+
+    def interrupt(self):
+        """
+        Non-standard. Interrupt the pending operation,
+        the state of client library is undefined after that, so the connection is closed.
+        :return: None
+        """
+        if self._db.closed:
+            return
+        self.interrupted = True
+        self.remove_callback()
+        self.close()
+
+    def _on_done(self, fut):
+        """the done callback of pending operation, interrupts connection if operation is cancelled"""
+        if self._future is fut:
+            self._future = None
+        if fut.cancelled():
+            self.interrupt()
+
+    def close(self):
+        """
+        close connection, the pending operation is cancelled
+        :return: None
+        """
+        future, self._future = self._future, None
+        self.remove_callback()
+        if future is not None:
+            future.cancel()
+        return self._db.close()
 
     def wrap_callback(self, fut, registered, func, *args):
         """
-        Wrap the callback
+        Wrap the callback.
+        The callback stays registered while the operation is not complete,
+        it is re-registered only if the operation changes the direction of socket events.
         :param fut: Future
         :param registered: flag, True if callback was register before
         :param func: callback method
         :param args: arguments that will be passed to callback
         :return: None
         """
-        if registered:
-            self.remove_callback()
         if fut.cancelled():
+            if registered:
+                self.remove_callback()
             return
         try:
-            status = func(*args)
-            if status[0] == self.NET_ASYNC_COMPLETE:
-                fut.set_result(status[1])
-            elif status[0] == self.NET_ASYNC_NOT_READY:
-                self.add_callback(self.wrap_callback, fut, True, func, *args)
+            status, result = func(*args)
+            if status == self.NET_ASYNC_NOT_READY:
+                # the registered callback is kept while the direction is the same
+                if not registered or self._registered != self.get_direction():
+                    self.add_callback(self.wrap_callback, fut, True, func, *args)
+                return
+            if registered:
+                self.remove_callback()
+            if status == self.NET_ASYNC_COMPLETE:
+                fut.set_result(result)
             else:
-                raise RuntimeError("Unexpected async status: %d" % status[0])
+                raise RuntimeError("Unexpected async status: %d" % status)
         except Exception as exc:
+            if registered:
+                self.remove_callback()
             fut.set_exception(exc)
 
+    async def call(self, func, *args):
+        """
+        Call non-blocking function and wait for result.
+        Unlike promise, the Future is created only if the result is not ready,
+        so the already available result is returned without using of event loop.
+        :param func: non-blocking function
+        :param args: function arguments
+        :return: the result of function
+        """
+        status, result = func(*args)
+        if status == self.NET_ASYNC_COMPLETE:
+            return result
+        if status != self.NET_ASYNC_NOT_READY:
+            raise RuntimeError("Unexpected async status: %d" % status)
+
+        fut = self._Future(loop=self._loop)
+        fut.add_done_callback(self._on_done)
+        self._future = fut
+        self.add_callback(self.wrap_callback, fut, True, func, *args)
+        return await fut
+
     def promise(self, func, *args):
         """
         Wrap non-blocking call and return promise
@@ -453,4 +818,146 @@ class AsyncConnection(ConnectionBase):
         """
         fut = self._Future(loop=self._loop)
         self.wrap_callback(fut, False, func, *args)
+        if not fut.done():
+            fut.add_done_callback(self._on_done)
+            self._future = fut
         return fut
+
+
+class AsyncDispatchConnection(AsyncConnection):
+    """
+    The asynchronous connection, that is driven by one long-lived callback.
+    The callback dispatches the socket events to the step function of the pending operation,
+    so the steps allocate neither futures nor event loop handles.
+    The socket is watched only while the operation is pending.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """
+        :param args: connection args, for details see connect
+        :param kwargs: connection keyword arguments, for details see AsyncConnection
+        """
+        super().__init__(*args, **kwargs)
+        # the pending operation: (future, function, arguments)
+        self._pending = None
+        self._dispatch = self._on_event
+
+    def _watch(self, direction):
+        """
+        register the dispatch callback for direction of socket events
+        :param direction: NET_ASYNC_READ or NET_ASYNC_WRITE
+        :return: None
+        """
+        if self._registered is not None:
+            self.remove_callback()
+        if direction == self.NET_ASYNC_READ:
+            self.add_read_callback(self._dispatch)
+        else:
+            self.add_write_callback(self._dispatch)
+        self._registered = direction
+
+    def _wait(self, fut, func, args):
+        """
+        make the operation pending and wait for the socket event
+        :param fut: the Future of operation
+        :param func: the step function of operation
+        :param args: the arguments of func
+        :return: None
+        """
+        pending = self._pending
+        if pending is not None and not pending[0].done():
+            raise self.ProgrammingError("the connection is busy by other operation")
+        self._pending = (fut, func, args)
+        fut.add_done_callback(self._on_done)
+        direction = self.get_direction()
+        if direction != self._registered:
+            self._watch(direction)
+
+    def _complete(self):
+        """
+        complete the pending operation and stop watching the socket
+        :return: None
+        """
+        self._pending = None
+        self.remove_callback()
+
+    def _on_event(self):
+        """
+        the callback of socket events, makes step of the pending operation
+        :return: None
+        """
+        pending = self._pending
+        if pending is None:
+            self.remove_callback()
+            return
+
+        fut, func, args = pending
+        if fut.cancelled():
+            self._complete()
+            return
+
+        try:
+            status, result = func(*args)
+            if status == self.NET_ASYNC_NOT_READY:
+                direction = self.get_direction()
+                if direction != self._registered:
+                    self._watch(direction)
+                return
+            self._complete()
+            if status == self.NET_ASYNC_COMPLETE:
+                fut.set_result(result)
+            else:
+                raise RuntimeError("Unexpected async status: %d" % status)
+        except Exception as exc:
+            self._complete()
+            fut.set_exception(exc)
+
+    async def call(self, func, *args):
+        """
+        Call non-blocking function and wait for result.
+        The Future is created only if the result is not ready.
+        :param func: non-blocking function
+        :param args: function arguments
+        :return: the result of function
+        """
+        status, result = func(*args)
+        if status == self.NET_ASYNC_COMPLETE:
+            return result
+        if status != self.NET_ASYNC_NOT_READY:
+            raise RuntimeError("Unexpected async status: %d" % status)
+
+        fut = self._Future(loop=self._loop)
+        self._wait(fut, func, args)
+        return await fut
+
+    def promise(self, func, *args):
+        """
+        Wrap non-blocking call and return promise
+        :param func: non-blocking function
+        :param args: function arguments
+        :return: promise
+        :rtype Future
+        """
+        fut = self._Future(loop=self._loop)
+        try:
+            status, result = func(*args)
+            if status == self.NET_ASYNC_COMPLETE:
+                fut.set_result(result)
+            elif status == self.NET_ASYNC_NOT_READY:
+                self._wait(fut, func, args)
+            else:
+                raise RuntimeError("Unexpected async status: %d" % status)
+        except Exception as exc:
+            fut.set_exception(exc)
+        return fut
+
+    def close(self):
+        """
+        close connection, the pending operation is cancelled
+        :return: None
+        """
+        pending = self._pending
+        self._complete()
+        if pending is not None:
+            pending[0].cancel()
+        return self._db.close()
@@ -19,6 +19,7 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from collections import defaultdict
 from decimal import Decimal
+from itertools import repeat
 import datetime
 import struct
 import _wsql
@@ -253,6 +254,28 @@ character_types = {
 }
 
 
+# the charsets, that can be decoded by the result natively
+native_charsets = {'utf8', 'utf8mb3', 'utf8mb4'}
+
+_string_decoders = {}
+
+
+def _get_string_decoders(charset):
+    """get the decoders of string and set for charset"""
+    try:
+        return _string_decoders[charset]
+    except KeyError:
+        pass
+
+    def char_to_str(s):
+        return s.decode(charset)
+
+    decoders = none_if_null(char_to_str), none_if_null(lambda x: {char_to_str(s) for s in x.split(b',') if s})
+    if charset in native_charsets:
+        native_decoders[decoders[0]] = _wsql.constants.CODEC_STRING
+    return _string_decoders.setdefault(charset, decoders)
+
+
 def character_decoder(connection, field):
     """convert value of mysql string type to python associated python type"""
     if field.type not in character_types:
@@ -261,15 +284,12 @@ def character_decoder(connection, field):
     if field.flags & _FLAG_BINARY:
         return bytes_or_None_if_NULL
 
-    charset = connection.charset
-
-    def char_to_str(s):
-        return s.decode(charset)
+    str_decoder, set_decoder = _get_string_decoders(connection.charset)
 
     if field.flags & _FLAG_SET:
-        return none_if_null(lambda x: {char_to_str(s) for s in x.split(b',') if s})
+        return set_decoder
 
-    return none_if_null(char_to_str)
+    return str_decoder
 
 
 default_decoders = [
@@ -284,6 +304,30 @@ default_encoders = [
 ]
 
 
+# The decoders, that have the native implementation in result.
+# The result applies them without the intermediate bytes object.
+native_decoders = {
+    bytes_or_None_if_NULL: _wsql.constants.CODEC_BYTES,
+    int_or_None_if_NULL: _wsql.constants.CODEC_INT,
+    float_or_None_if_NULL: _wsql.constants.CODEC_FLOAT,
+    decimal_or_None_if_NULL: _wsql.constants.CODEC_DECIMAL,
+    date_or_None_if_NULL: _wsql.constants.CODEC_DATE,
+    datetime_or_None_if_NULL: _wsql.constants.CODEC_DATETIME,
+    timedelta_or_None_if_NULL: _wsql.constants.CODEC_TIME,
+}
+
+
+def get_native_codecs(decoders):
+    """
+    make the plan to decode row in result
+    :param decoders: the decoders of columns
+    :return: the codecs for result.set_codecs
+    :rtype: tuple
+    """
+    native = native_decoders
+    return tuple(native.get(d, d) for d in decoders)
+
+
 def get_codec(connection, field, codecs):
     """
     select codec
@@ -300,6 +344,78 @@ def get_codec(connection, field, codecs):
     raise connection.NotSupportedError(("could not encode as SQL", field))
 
 
+# The resolved encoders by encoder stack, the encoder is selected by exact type of value,
+# so the encoders in stack should not depend on anything except the type of value.
+_encoders_cache = {}
+
+
+def get_encoders_cache(encoders):
+    """
+    get the cache of resolved encoders for encoder stack
+    :param encoders: the list of encoders
+    :return: the mapping from type to encoder
+    :rtype: dict
+    """
+    key = tuple(encoders)
+    try:
+        return _encoders_cache[key]
+    except KeyError:
+        return _encoders_cache.setdefault(key, {})
+
+
+def invalidate_encoders_cache():
+    """
+    drop the resolved encoders, should be called after encoders
+    (for example, simple_type_encoders) have been changed in-place
+    """
+    _encoders_cache.clear()
+
+
+def encode(connection, value, encoders, cache=None):
+    """
+    convert value to sql literal
+    :param connection: the connection object
+    :param value: the value to convert
+    :param encoders: the list of encoders
+    :param cache: the cache of encoders, see get_encoders_cache
+    :return: the sql literal
+    """
+    if cache is None:
+        cache = get_encoders_cache(encoders)
+    try:
+        encoder = cache[type(value)]
+    except KeyError:
+        encoder = cache.setdefault(type(value), get_codec(connection, value, encoders))
+    return encoder(connection, value)
+
+
+def encode_args(connection, args, encoders, cache=None):
+    """
+    convert arguments of query to sql literals
+    :param connection: the connection object
+    :param args: the sequence of values
+    :param encoders: the list of encoders
+    :param cache: the cache of encoders, see get_encoders_cache
+    :return: the tuple of sql literals
+    :rtype: tuple
+    """
+    if cache is None:
+        cache = get_encoders_cache(encoders)
+    return tuple(encode(connection, a, encoders, cache) for a in args)
+
+
+def as_is(value):
+    """the decoder of value, that has been decoded already"""
+    return value
+
+
+# The row decoders, that are passed to row formatter if the row
+# has been decoded by result already. It is an infinite iterator,
+# so the row formatter should zip decoders with row or check
+# "decoders is DECODED" instead of indexing or measuring decoders.
+DECODED = repeat(as_is)
+
+
 def iter_row_decoder(decoders, _, row):
     """
     convert mysql row to iterable object
@@ -310,6 +426,8 @@ def iter_row_decoder(decoders, _, row):
     """
     if row is None:
         return None
+    if decoders is DECODED:
+        return iter(row)
     return (d(col) for d, col in zip(decoders, row))
 
 
@@ -324,6 +442,8 @@ def tuple_row_decoder(decoders, names, row):
     """
     if row is None:
         return None
+    if decoders is DECODED:
+        return row
     return tuple(iter_row_decoder(decoders, names, row))
 
 
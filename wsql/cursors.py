@@ -17,10 +17,10 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from .converters import get_codec
+from .converters import get_codec, get_native_codecs, get_encoders_cache, encode, encode_args, DECODED
+from itertools import chain
 from warnings import warn
 import _wsql
-import asyncio
 import re
 import weakref
 
@@ -37,6 +37,7 @@ class CursorBase:
 
     _use_result = False
     _defer_warnings = False
+    _lazy_warnings = False
 
     ProgrammingError = _wsql.exceptions.ProgrammingError
     StandardError = _wsql.exceptions.StandardError
@@ -60,12 +61,15 @@ class CursorBase:
         self._warnings = 0
         self._info = None
         self._row_decoders = ()
+        self._names = ()
 
         # override from connection
         if connection.use_result is not None:
             self._use_result = connection.use_result
         if connection.defer_warnings is not None:
             self._defer_warnings = connection.defer_warnings
+        if connection.lazy_warnings is not None:
+            self._lazy_warnings = connection.lazy_warnings
 
     def __del__(self):
         if self._result is not None:
@@ -87,14 +91,39 @@ class CursorBase:
         :param connection: mysql connection
         """
 
-        result = connection.get_result(self._use_result)
+        return self._set_result(connection, connection.get_result(self._use_result))
+
+    def _set_result(self, connection, result):
+        """
+        construct the objects accosiated with mysql result
+        :param connection: mysql connection
+        :param result: mysql result or None
+        """
         if result is not None:
-            decoders = self.decoders
-            self._row_decoders = tuple(get_codec(connection, field, decoders) for field in result.fields)
+            result.set_codecs(self._get_codecs(connection, result))
+            self._row_decoders = DECODED
+            self._names = result.names
             self._rowcount = result.num_rows
             self._result = result
             return True
 
+    def _get_codecs(self, connection, result):
+        """
+        get the codecs of result columns, the resolved codecs are cached per connection
+        by the shape of result, so the repeated queries skip resolving of decoders.
+        :param connection: mysql connection
+        :param result: mysql result
+        :return: the codecs for result.set_codecs
+        """
+        decoders = self.decoders
+        fields = result.fields
+        key = (tuple(decoders), connection.charset, tuple((f.type, f.flags, f.charsetnr, f.name) for f in fields))
+        cache = connection.decoders_cache
+        codecs = cache.get(key)
+        if codecs is None:
+            codecs = cache.put(key, get_native_codecs(get_codec(connection, field, decoders) for field in fields))
+        return codecs
+
     def _release_result(self):
         """
         destroy mysql result
@@ -104,15 +133,52 @@ class CursorBase:
         self._result = None
         self._rowcount = -1
         self._row_decoders = None
+        self._names = None
         return result
 
+    def _format_rows(self, rows):
+        """
+        format the batch of raw rows
+        :param rows: the list of raw rows
+        :return the list of formatted rows
+        """
+        row_formatter = self.row_formatter
+        decoders = self._row_decoders
+        names = self._names
+        return [row_formatter(decoders, names, row) for row in rows]
+
+    def _render_batches(self, connection, values, prefix, suffix, args, max_size, separator=b',\n'):
+        """
+        render the multi-row queries, each query fits into max_size bytes
+        :param connection: the connection object
+        :param values: the template of row
+        :param prefix: the part of query before rows
+        :param suffix: the part of query after rows
+        :param args: the rows of arguments
+        :param max_size: the maximum size of query
+        :param separator: the separator of rows
+        :return the generator of queries
+        """
+        encoders = self.encoders
+        cache = get_encoders_cache(encoders)
+        template = connection.template(values)
+        rows = (encode_args(connection, row, encoders, cache) for row in args)
+        batch = rows
+        while True:
+            query, row = template.render_many(batch, prefix, suffix, separator, max_size)
+            if query is not None:
+                yield query
+            if row is None:
+                break
+            batch = chain((row,), rows)
+
     def _encode(self, connection, obj):
         """
         Given an object obj, returns an SQL literal as a string. Non-standard.
         :param obj: object to encode
         :return sql literal
         """
-        return get_codec(connection, obj, self.encoders)(connection, obj)
+        return encode(connection, obj, self.encoders)
 
     @property
     def connection(self):
@@ -199,6 +265,9 @@ class Cursor(CursorBase):
             result.free()
         except self.StandardError as e:
             warn(connection.Warning(str(e)))
+        finally:
+            # the statement of execute_prepared can be used by other cursors
+            connection.release_statement(result)
 
     def close(self):
         """close cursor and release resources"""
@@ -247,7 +316,7 @@ class Cursor(CursorBase):
                 query = query.encode(connection.charset)
 
             if args is not None:
-                query = connection.format(query, tuple(get_codec(connection, a, self.encoders)(connection, a) for a in args))
+                query = connection.template(query).render(encode_args(connection, args, self.encoders))
 
             self._query(connection, query)
 
@@ -259,6 +328,43 @@ class Cursor(CursorBase):
         except Exception as e:
             self.errorhandler(e)
 
+    def execute_prepared(self, query, args=()):
+        """
+        Execute a query as the server-side prepared statement.
+        The statement is prepared once per connection, the parameters and rows are
+        transferred by the binary protocol, so the numbers, dates and times are neither
+        quoted nor parsed. The rows are decoded natively, the decoders are not applied.
+        Non-standard.
+        :param query: string, query to execute on server, '?' must be used as the parameter placeholder
+        :param args: optional sequence, parameters to use with query.
+        """
+        try:
+            connection = self.connection
+            self._free_result()
+            statement = connection.acquire_statement(query)
+            try:
+                statement.execute(args)
+            except BaseException:
+                connection.release_statement(statement)
+                raise
+
+            if statement.num_fields:
+                self._row_decoders = DECODED
+                self._names = statement.names
+                self._rowcount = statement.num_rows
+                self._result = statement
+            else:
+                connection.release_statement(statement)
+                self._rowcount = statement.affected_rows
+
+            if not self._defer_warnings:
+                self.warning_check()
+
+        except TypeError as e:
+            self.errorhandler(self.ProgrammingError(str(e)))
+        except Exception as e:
+            self.errorhandler(e)
+
     def executemany(self, query, args):
         """
         Execute a multi-row query.
@@ -279,11 +385,7 @@ class Cursor(CursorBase):
 
         matched = INSERT_VALUES.match(query)
         if not matched:
-            rowcount = 0
-            for row in args:
-                self.execute(query, row)
-                rowcount += self._rowcount
-            self._rowcount = rowcount
+            self._execute_statements(connection, query, args)
             return
 
         start = matched.group('start')
@@ -291,12 +393,48 @@ class Cursor(CursorBase):
         end = matched.group('end')
 
         try:
-            sql_params = (connection.format(values, tuple(get_codec(connection, a, self.encoders)(connection, a) for a in row)) for row in args)
-            multi_row_query = b'\n'.join([start, b',\n'.join(sql_params), end])
-            self._query(connection, multi_row_query)
+            self._free_result()
+            rowcount = 0
+            max_size = connection.get_max_allowed_packet() - 1
+            for multi_row_query in self._render_batches(connection, values, start + b'\n', b'\n' + end, args, max_size):
+                self._query(connection, multi_row_query)
+                rowcount += connection.affected_rows
 
-            if not self._defer_warnings:
-                self.warning_check()
+                if not self._defer_warnings:
+                    self.warning_check()
+            self._rowcount = rowcount
+
+        except TypeError as e:
+            self.errorhandler(self.ProgrammingError(e))
+        except Exception as e:
+            self.errorhandler(e)
+
+    def _execute_statements(self, connection, query, args):
+        """
+        Execute query with each row of args, the statements are packed
+        into multi-statement queries to save round trips.
+        :param connection: the connection object
+        :param query: the query to execute
+        :param args: the rows of arguments
+        """
+        try:
+            self._free_result()
+            rowcount = 0
+            max_size = connection.get_max_allowed_packet() - 1
+            statement = query.rstrip(b' \t\r\n;')
+            for multi_query in self._render_batches(connection, statement, b'', b'', args, max_size, b';\n'):
+                self._query(connection, multi_query)
+                while True:
+                    rowcount += connection.affected_rows
+                    self._free_result()
+                    if not connection.next_result():
+                        break
+                    self._acquire_result(connection)
+
+                # the warnings can be read only after all results of query
+                if not self._defer_warnings:
+                    self.warning_check()
+            self._rowcount = rowcount
 
         except TypeError as e:
             self.errorhandler(self.ProgrammingError(e))
@@ -356,7 +494,7 @@ class Cursor(CursorBase):
         :return formatted row or None if there is no more rows
         """
         self._check_has_result()
-        return self.row_formatter(self._row_decoders, (x[0] for x in self._result.description), self._result.fetch_row())
+        return self.row_formatter(self._row_decoders, self._names, self._result.fetch_row())
 
     def fetchmany(self, size=None):
         """Fetch up to size rows from the cursor. Result set may be smaller
@@ -366,19 +504,28 @@ class Cursor(CursorBase):
         if size is None:
             size = self.arraysize
 
-        rows = []
-        append = rows.append
-        for _ in range(size):
-            row = self.fetchone()
-            if row is None:
-                break
-            append(row)
-        return rows
+        return self._format_rows(self._result.fetch_rows(max(size, 0)))
 
     def fetchall(self):
         """Fetches all available rows from the cursor."""
         self._check_has_result()
-        return [row for row in self]
+        return self._format_rows(self._result.fetch_rows())
+
+    def fetch_columns(self, size=None):
+        """
+        Fetches up to size rows from the cursor as columns.
+        Not standard
+        :param size: the maximum number of rows, if size is not defined, all available rows are fetched
+        :return tuple with a container per column, the NOT NULL integer and float columns are array.array,
+                that supports the buffer protocol, the other columns are lists of decoded values
+        """
+        self._check_has_result()
+        fetch_columns = getattr(self._result, 'fetch_columns', None)
+        if fetch_columns is None:
+            self.errorhandler(self.NotSupportedError("fetch_columns is not supported for prepared statements"))
+        if size is None:
+            return fetch_columns()
+        return fetch_columns(max(size, 0))
 
     def fetchxall(self):
         """
@@ -413,64 +560,121 @@ class AsyncCursor(CursorBase):
 
         free_async = fetch_row_async
 
+    async def __aenter__(self):
+        """asynchronous context manager"""
+        return self
+
+    async def __aexit__(self, *_):
+        """asynchronous context manager"""
+        await self.close()
+        return False
+
+    def __aiter__(self):
+        """asynchronous iterable object protocol"""
+        return self
+
+    async def __anext__(self):
+        """asynchronous iterator protocol"""
+        row = await self.fetchone()
+        if row is None:
+            raise StopAsyncIteration
+        return row
+
     @property
     def rowcount(self):
-        """number of row in current result, always return -1"""
-        # there is no way to get number of rows from async result
-        return -1
+        """number of row in current result, return -1 if the result is not stored"""
+        # there is no way to get number of rows from unbuffered result
+        result = self._result
+        if result is not None and result.use:
+            return -1
+        return self._rowcount
 
-    @asyncio.coroutine
-    def _free_result(self):
+    async def _acquire_result(self, connection):
+        """
+        read mysql result and construct accosiated objects,
+        if use_result is False, the whole result is stored in client buffer in non-blocking manner
+        :param connection: mysql connection
+        """
+        if self._use_result:
+            result = connection.get_result(True)
+        else:
+            result = await connection.store_result()
+        return self._set_result(connection, result)
+
+    async def _free_result(self):
         """free all resources associated with current result"""
         result = super()._release_result()
         if result is not None:
             connection = self.connection
             try:
+                if not result.use:
+                    result.free()
+                    return
+
                 if result.more_rows:
-                    while (yield from connection.promise(result.fetch_row_async)) is not None:
+                    while (await connection.call(result.fetch_row_async)) is not None:
                         pass
 
-                yield from connection.promise(result.free_async)
+                await connection.call(result.free_async)
             except self.StandardError as e:
                 warn(connection.Warning(str(e)))
 
-    @asyncio.coroutine
-    def close(self):
+    async def close(self):
         """close cursor and free resources"""
         connection = self._connection()
         if connection:
-            while (yield from self.nextset()):
+            while await self.nextset():
                 pass
 
-    @asyncio.coroutine
-    def warning_check(self):
-        """Check for warnings, and report via the warnings module."""
+    async def warning_check(self):
+        """
+        Check for warnings, and report via the warnings module.
+        If lazy_warnings is set, only the number of warnings is remembered,
+        the warnings itself are read by fetch_warnings.
+        """
         connection = self.connection
-        if connection.warning_count:
-            warnings = yield from connection.show_warnings()
-            if warnings:
-                for warning in map(connection.Warning, warnings):
-                    self.messages.append(warning)
-                    warn(warning, stacklevel=3)
-            elif self._info:
-                warning = connection.Warning(self._info)
-                self.messages.append(warning)
-                warn(warning, stacklevel=3)
+        warning_count = connection.warning_count
+        if warning_count:
+            if self._lazy_warnings:
+                self._warnings = warning_count
+                return
+            await self._report_warnings(connection)
+
+    async def fetch_warnings(self):
+        """
+        Non-standard. Read the warnings of the last query, that were skipped because of lazy_warnings,
+        the warnings are added to messages and reported via the warnings module.
+        Should be called before the next query is sent by connection.
+        :return the list of warnings
+        :rtype list
+        """
+        if not self._warnings:
+            return []
+        self._warnings = 0
+        return await self._report_warnings(self.connection)
 
-    @asyncio.coroutine
-    def nextset(self):
+    async def _report_warnings(self, connection):
+        """Read the warnings from server, and report via the warnings module."""
+        warnings = [connection.Warning(x) for x in await connection.show_warnings()]
+        if not warnings and self._info:
+            warnings.append(connection.Warning(self._info))
+        for warning in warnings:
+            self.messages.append(warning)
+            warn(warning, stacklevel=4)
+        return warnings
+
+    async def nextset(self):
         """
         Advance to the next result set.
         Returns False if there are no more result sets.
         """
-        yield from self._free_result()
+        await self._free_result()
         connection = self.connection
-        if (yield from connection.next_result()):
-            if self._acquire_result(connection):
+        if await connection.next_result():
+            if await self._acquire_result(connection):
                 return True
 
-    @asyncio.coroutine
-    def execute(self, query, args=None):
+    async def execute(self, query, args=None):
         """
         Execute a query.
         :param query: query to execute on server
@@ -486,19 +690,18 @@ class AsyncCursor(CursorBase):
                 query = query.encode(connection.charset)
 
             if args is not None:
-                query = connection.format(query, tuple(get_codec(connection, a, self.encoders)(connection, a) for a in args))
+                query = connection.template(query).render(encode_args(connection, args, self.encoders))
 
-            yield from self._query(connection, query)
+            await self._query(connection, query)
 
             if not self._defer_warnings:
-                yield from self.warning_check()
+                await self.warning_check()
         except TypeError as e:
             self.errorhandler(self.ProgrammingError(str(e)))
         except Exception as e:
             self.errorhandler(e)
 
-    @asyncio.coroutine
-    def executemany(self, query, args):
+    async def executemany(self, query, args):
         """
         Execute a multi-row query.
         This method improves performance on multiple-row INSERT and REPLACE.
@@ -518,8 +721,7 @@ class AsyncCursor(CursorBase):
 
         matched = INSERT_VALUES.match(query)
         if not matched:
-            for row in args:
-                yield from self.execute(query, row)
+            await self._execute_statements(connection, query, args)
             return
 
         start = matched.group('start')
@@ -527,19 +729,54 @@ class AsyncCursor(CursorBase):
         end = matched.group('end')
 
         try:
-            sql_params = (connection.format(values, tuple(get_codec(connection, a, self.encoders)(connection, a) for a in row)) for row in args)
-            multi_row_query = b'\n'.join([start, b',\n'.join(sql_params), end])
-            yield from self._query(connection, multi_row_query)
+            await self._free_result()
+            rowcount = 0
+            max_size = (await connection.get_max_allowed_packet()) - 1
+            for multi_row_query in self._render_batches(connection, values, start + b'\n', b'\n' + end, args, max_size):
+                await self._query(connection, multi_row_query)
+                rowcount += connection.affected_rows
 
-            if not self._defer_warnings:
-                yield from self.warning_check()
+                if not self._defer_warnings:
+                    await self.warning_check()
+            self._rowcount = rowcount
         except TypeError as e:
             self.errorhandler(self.ProgrammingError(e))
         except Exception as e:
             self.errorhandler(e)
 
-    @asyncio.coroutine
-    def callproc(self, procname, args=()):
+    async def _execute_statements(self, connection, query, args):
+        """
+        Execute query with each row of args, the statements are packed
+        into multi-statement queries to save round trips.
+        :param connection: the connection object
+        :param query: the query to execute
+        :param args: the rows of arguments
+        """
+        try:
+            await self._free_result()
+            rowcount = 0
+            max_size = (await connection.get_max_allowed_packet()) - 1
+            statement = query.rstrip(b' \t\r\n;')
+            for multi_query in self._render_batches(connection, statement, b'', b'', args, max_size, b';\n'):
+                await self._query(connection, multi_query)
+                while True:
+                    rowcount += connection.affected_rows
+                    await self._free_result()
+                    if not await connection.next_result():
+                        break
+                    await self._acquire_result(connection)
+
+                # the warnings can be read only after all results of query
+                if not self._defer_warnings:
+                    await self.warning_check()
+            self._rowcount = rowcount
+
+        except TypeError as e:
+            self.errorhandler(self.ProgrammingError(e))
+        except Exception as e:
+            self.errorhandler(e)
+
+    async def callproc(self, procname, args=()):
         """
         Execute stored procedure procname with args
 
@@ -559,31 +796,30 @@ class AsyncCursor(CursorBase):
 
             if args:
                 for statement in (connection.format(b"SET @`_%s_%d`=%s", (procname, index, self._encode(connection, arg))) for index, arg in enumerate(args)):
-                    yield from self._query(connection, statement)
-                yield from self.nextset()
+                    await self._query(connection, statement)
+                await self.nextset()
 
             query = connection.format(b"CALL `%s`(%s)",
                                       (procname,
                                        b','.join(connection.format(b'@`_%s_%d`', (procname, i)) for i in range(len(args)))))
 
-            yield from self._query(connection, query)
+            await self._query(connection, query)
             if not self._defer_warnings:
-                yield from self.warning_check()
+                await self.warning_check()
             return args
         except TypeError as e:
             self.errorhandler(self.ProgrammingError(e))
         except Exception as e:
             self.errorhandler(e)
 
-    @asyncio.coroutine
-    def _query(self, connection, query):
+    async def _query(self, connection, query):
         """Low-level; executes query, gets result, sets up decoders."""
-        yield from self._free_result()
-        yield from connection.query(query)
-        self._acquire_result(connection)
+        await self._free_result()
+        self._warnings = 0
+        await connection.query(query)
+        await self._acquire_result(connection)
 
-    @asyncio.coroutine
-    def fetchone(self):
+    async def fetchone(self):
         """
         Fetches a single row from the cursor. None indicates that
         no more rows are available.
@@ -591,11 +827,14 @@ class AsyncCursor(CursorBase):
         """
         self._check_has_result()
 
-        connection = self.connection
-        return self.row_formatter(self._row_decoders, (x[0] for x in self._result.description), (yield from connection.promise(self._result.fetch_row_async)))
+        result = self._result
+        if result.use:
+            row = await self.connection.call(result.fetch_row_async)
+        else:
+            row = result.fetch_row()
+        return self.row_formatter(self._row_decoders, self._names, row)
 
-    @asyncio.coroutine
-    def fetchmany(self, size=None):
+    async def fetchmany(self, size=None):
         """Fetch up to size rows from the cursor. Result set may be smaller
         than size. If size is not defined, cursor.arraysize is used."""
         self._check_has_result()
@@ -603,37 +842,52 @@ class AsyncCursor(CursorBase):
         if size is None:
             size = self.arraysize
 
-        rows = []
-        append = rows.append
-        for _ in range(size):
-            row = yield from self.fetchone()
-            if row is None:
-                break
-            append(row)
-        return rows
+        return await self._fetch_rows(max(size, 0))
 
-    @asyncio.coroutine
-    def fetchall(self):
+    async def fetchall(self):
         """Fetches all available rows from the cursor."""
         self._check_has_result()
+        return await self._fetch_rows(-1)
 
+    async def _fetch_rows(self, size):
+        """
+        fetch rows by batches, the all buffered rows are fetched per one call
+        :param size: the maximum number of rows, negative value means all rows
+        :return the list of formatted rows
+        """
+        result = self._result
+        if not result.use:
+            return self._format_rows(result.fetch_rows(size))
+
+        connection = self.connection
         rows = []
-        append = rows.append
-        while True:
-            row = yield from self.fetchone()
-            if row is None:
+        while size < 0 or len(rows) < size:
+            batch = await connection.call(result.fetch_rows_async, size - len(rows) if size >= 0 else -1)
+            if not batch:
                 break
-            append(row)
+            rows.extend(self._format_rows(batch))
         return rows
 
-    @asyncio.coroutine
-    def fetchxall(self):
+    async def fetch_columns(self):
+        """
+        Fetches all available rows from the cursor as columns.
+        Not standard
+        :return tuple with a container per column, the NOT NULL integer and float columns are array.array,
+                that supports the buffer protocol, the other columns are lists of decoded values
+        """
+        self._check_has_result()
+        result = self._result
+        if not result.use:
+            return result.fetch_columns()
+        return await self.connection.call(result.fetch_columns_async)
+
+    async def fetchxall(self):
         """
         Same as self.nextset(), self.fetchall()
         Not standard
         """
-        r = (yield from self.fetchall())
-        yield from self.nextset()
+        r = await self.fetchall()
+        await self.nextset()
         return r
 
     def scroll(self, offset, mode='relative'):
@@ -645,3 +899,107 @@ class AsyncCursor(CursorBase):
         Not supported yet
         """
         raise self.NotSupportedError
+
+
+class Pipeline:
+    """
+    Sends the independent queries as one multi-statement query,
+    so they cost one round trip instead of a round trip per query.
+    The futures of queries are resolved in order, as the result sets arrive.
+    Non-standard.
+    """
+
+    def __init__(self, cursor):
+        """
+        :param cursor: the asynchronous cursor, that is used to read results
+        """
+        self._cursor = cursor
+        self._queries = []
+        self._futures = []
+
+    def execute(self, query, args=None):
+        """
+        Add query to pipeline, the query should contain a single statement.
+        :param query: query to execute on server
+        :param args: optional sequence or mapping, parameters to use with query.
+        :return: the Future, which is resolved by the list of formatted rows if query returns result set,
+                 otherwise by the number of affected rows
+        :rtype Future
+        """
+        cursor = self._cursor
+        connection = cursor.connection
+        if isinstance(query, str):
+            query = query.encode(connection.charset)
+
+        if args is not None:
+            query = connection.template(query).render(encode_args(connection, args, cursor.encoders))
+
+        future = connection._Future(loop=connection._loop)
+        self._queries.append(query.rstrip(b' \t\r\n;'))
+        self._futures.append(future)
+        return future
+
+    async def run(self):
+        """
+        Send the queued queries and resolve their futures.
+        The error of statement is set to its future and the futures of following statements are cancelled,
+        because the server does not execute statements after the failed one.
+        If run is interrupted, all unresolved futures are cancelled.
+        """
+        queries, futures = self._queries, self._futures
+        self._queries, self._futures = [], []
+        if not queries:
+            return
+
+        cursor = self._cursor
+        connection = cursor.connection
+        index = 0
+        try:
+            await cursor._query(connection, b';\n'.join(queries))
+            while True:
+                if cursor._result is not None:
+                    value = await cursor.fetchall()
+                else:
+                    value = connection.affected_rows
+                future = futures[index]
+                if not future.cancelled():
+                    future.set_result(value)
+                index += 1
+                await cursor._free_result()
+                if not await connection.next_result():
+                    break
+                await cursor._acquire_result(connection)
+
+            # the warnings can be read only after all results of query
+            if not cursor._defer_warnings:
+                await cursor.warning_check()
+        except BaseException as e:
+            failed = isinstance(e, Exception) and index < len(futures)
+            if failed:
+                future = futures[index]
+                if not future.cancelled():
+                    future.set_exception(e)
+                index += 1
+            for future in futures[index:]:
+                future.cancel()
+            if not failed:
+                raise
+            await cursor._free_result()
+
+    def cancel(self):
+        """cancel the queued queries"""
+        for future in self._futures:
+            future.cancel()
+        self._queries, self._futures = [], []
+
+    async def __aenter__(self):
+        """asynchronous context manager"""
+        return self
+
+    async def __aexit__(self, exc, *_):
+        """asynchronous context manager, sends the queries on exit"""
+        if exc:
+            self.cancel()
+        else:
+            await self.run()
+        return False